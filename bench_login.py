@@ -0,0 +1,98 @@
+"""
+Login throughput benchmark for src.auth under concurrency.
+
+Creates users in a throwaway SQLite DB, then for each bcrypt pool size and thread
+count runs password logins (authenticate: DB lookup + bcrypt on the pool) while a
+probe thread measures how long a lightweight "other session" task gets stalled.
+
+    python bench_login.py [--rounds 12] [--workers 1,2,4] [--threads 1,8,32] [--logins 64]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def _parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=12, help="bcrypt cost factor")
+    parser.add_argument("--workers", default="1,2,4", help="bcrypt pool sizes to compare")
+    parser.add_argument("--threads", default="1,8,32", help="concurrent login threads")
+    parser.add_argument("--logins", type=int, default=64, help="password logins per run")
+    parser.add_argument("--users", type=int, default=32)
+    return parser.parse_args()
+
+
+ARGS = _parse_args()
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="filmophile-bench-"), "auth.db")
+os.environ["BCRYPT_ROUNDS"] = str(ARGS.rounds)
+
+import src.auth as auth  # noqa: E402
+from src.db import SessionLocal, User, init_db  # noqa: E402
+
+
+def pct(values, p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100.0 * (len(values) - 1))))] if values else 0.0
+
+
+def probe(stop: threading.Event, stalls: list):
+    """Stand-in for another session's rerun: 5 ms sleep + a little Python work, measure the overrun."""
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        time.sleep(0.005)
+        sum(range(2000))
+        stalls.append((time.perf_counter() - t0 - 0.005) * 1000)
+
+
+def run_logins(n_threads: int, emails: list):
+    latencies, stalls = [], []
+    stop = threading.Event()
+    prober = threading.Thread(target=probe, args=(stop, stalls), daemon=True)
+
+    def one(i: int):
+        t0 = time.perf_counter()
+        ok, msg, _ = auth.authenticate(emails[i % len(emails)], "benchmark-pw")
+        assert ok, msg
+        latencies.append((time.perf_counter() - t0) * 1000)
+
+    prober.start()
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=n_threads) as pool:
+        list(pool.map(one, range(ARGS.logins)))
+    elapsed = time.perf_counter() - t0
+    stop.set()
+    prober.join()
+    return ARGS.logins / elapsed, latencies, stalls
+
+
+def main() -> int:
+    init_db()
+    workers = [int(w) for w in ARGS.workers.split(",")]
+    threads = [int(t) for t in ARGS.threads.split(",")]
+
+    t0 = time.perf_counter()
+    with SessionLocal() as s:
+        emails = [f"bench-{i}@example.com" for i in range(ARGS.users)]
+        with ThreadPoolExecutor(max_workers=max(workers)) as pool:
+            hashes = list(pool.map(lambda _: auth.hash_password("benchmark-pw"), emails))
+        s.add_all(User(email=e, password_hash=h, display_name=e) for e, h in zip(emails, hashes))
+        s.commit()
+    print(f"bcrypt cost {ARGS.rounds}: created {ARGS.users} users in {time.perf_counter() - t0:.1f}s\n")
+
+    print(f"{'pool':>4s} {'threads':>7s} {'logins/s':>9s} {'p50 ms':>8s} {'p99 ms':>8s} {'probe stall p99 ms':>19s}")
+    for w in workers:
+        auth._bcrypt_pool.shutdown()
+        auth._bcrypt_pool = ThreadPoolExecutor(max_workers=w, thread_name_prefix="bcrypt")
+        for t in threads:
+            rate, lat, stalls = run_logins(t, emails)
+            print(f"{w:4d} {t:7d} {rate:9.1f} {pct(lat, 50):8.1f} {pct(lat, 99):8.1f} {pct(stalls, 99):19.2f}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""
+Cold-start import benchmark for the login page.
+
+Runs `python -X importtime` over the modules streamlit_app.py imports at module
+level (read from the file), i.e. everything loaded before the login page renders, and exits with status 1 if a heavy dependency (pandas,
+scikit-learn, Gemini, the engine itself) is pulled in or if the cumulative
+import time exceeds the budget.
+
+    python bench_startup.py [--budget-ms 1500] [--repeat 3]
+
+The same check runs in the test suite (tests/test_startup.py).
+"""
+import argparse
+import ast
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent
+
+APP_FILE = BASE_DIR / "streamlit_app.py"
+ENGINE_IMPORTS = "import src.recommender"
+
+BUDGET_MS = 1500.0
+FORBIDDEN = ("pandas", "sklearn", "scipy", "google.generativeai", "src.recommender", "src.gemini_api")
+
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def app_imports(path: Path = APP_FILE) -> str:
+    """
+    Import statement for every module the app imports at module level, read from the
+    file itself so new imports are checked too (`if TYPE_CHECKING:` blocks and imports
+    inside functions are deferred and skipped).
+    """
+    modules = []
+    for node in ast.parse(path.read_text(encoding="utf-8")).body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            modules.append(node.module)
+    return "import " + ", ".join(dict.fromkeys(modules))
+
+
+def importtime(statement: str) -> dict:
+    """Return {module: cumulative_us} for top-level imports of `statement` in a fresh interpreter."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=BASE_DIR, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import failed:\n{proc.stderr[-2000:]}")
+    modules = {}
+    for line in proc.stderr.splitlines():
+        m = _LINE.match(line)
+        if m:
+            modules[m.group(4)] = (int(m.group(2)), len(m.group(3)))
+    return modules
+
+
+def total_ms(modules: dict) -> float:
+    # top-level entries (indent 1) already include their children
+    return sum(cum for cum, depth in modules.values() if depth == 1) / 1000.0
+
+
+def login_imports(repeat: int = 3) -> dict:
+    """Fastest of `repeat` runs of the login-path imports, minus interpreter startup modules."""
+    startup = set(importtime("pass"))   # interpreter startup (site, encodings, ...)
+    runs = [
+        {m: v for m, v in importtime(app_imports()).items() if m not in startup}
+        for _ in range(max(1, repeat))
+    ]
+    return min(runs, key=total_ms)
+
+
+def leaked_modules(modules: dict) -> list:
+    return sorted(m for m in modules if m in FORBIDDEN)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=BUDGET_MS, help="max cumulative login-path import time")
+    parser.add_argument("--repeat", type=int, default=3, help="runs to take the best of")
+    args = parser.parse_args()
+
+    startup = set(importtime("pass"))
+    best = login_imports(args.repeat)
+    login_ms = total_ms(best)
+    leaked = leaked_modules(best)
+
+    slowest = sorted(((cum, m) for m, (cum, depth) in best.items() if depth == 1), reverse=True)[:5]
+    print(f"Login path imports: {login_ms:.0f} ms (budget {args.budget_ms:.0f} ms)")
+    for cum, m in slowest:
+        print(f"  {cum / 1000.0:8.1f} ms  {m}")
+    engine = {m: v for m, v in importtime(ENGINE_IMPORTS).items() if m not in startup}
+    print(f"Engine imports (deferred): {total_ms(engine):.0f} ms")
+
+    ok = True
+    if leaked:
+        print(f"❌ Heavy modules imported before login: {', '.join(leaked)}")
+        ok = False
+    if login_ms > args.budget_ms:
+        print(f"❌ Login path import time {login_ms:.0f} ms exceeds budget {args.budget_ms:.0f} ms")
+        ok = False
+    if ok:
+        print("✅ Cold-start import budget met.")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
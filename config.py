@@ -31,6 +31,8 @@ interests, and past activity to suggest the best movies for you.
 MIN_PASS_LEN = 6
 JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "supersecretkey")  # replace in production
 JWT_ALGORITHM = "HS256"
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))           # cost factor for new hashes (4..31)
+AUTH_WORKERS = int(os.getenv("AUTH_WORKERS", "2"))              # threads that run bcrypt for all sessions
 
 # ==========================
 # Gemini / AI Integration
@@ -42,6 +44,39 @@ GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "your-gemini-api-key")
 # ==========================
 EVAL_THRESHOLD = 0.6  # threshold for adjusting recommendations
 
+# ==========================
+# Recommendation Engine
+# ==========================
+RECOMMENDER_BACKEND = os.getenv("RECOMMENDER_BACKEND", "tfidf")  # tfidf | embedding
+EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", "128"))           # LSA components per movie
+EMBEDDING_DTYPE = os.getenv("EMBEDDING_DTYPE", "float32")        # float32 | float16 (memmap on disk)
+
+# TF-IDF build: movie chunks are tokenized/counted across a process pool
+BUILD_WORKERS = int(os.getenv("BUILD_WORKERS", "0"))            # 0 = one per CPU
+BUILD_CHUNK_SIZE = int(os.getenv("BUILD_CHUNK_SIZE", "20000"))  # movies per chunk
+
+# Sharded engine (src/sharding.py): catalog split into contiguous row ranges, one process per shard
+SHARD_COUNT = int(os.getenv("SHARD_COUNT", "4"))
+
+# Recommendation result cache: LRU entries keyed by (user state version, query, top_k)
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "2048"))
+RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", "600"))  # seconds; refreshes Gemini picks
+USER_VERSIONS_SIZE = int(os.getenv("USER_VERSIONS_SIZE", "100000"))  # users whose cache version is kept
+
+# Interaction log retention (src/rollup.py): raw rows older than this are archived
+INTERACTION_RETENTION_DAYS = int(os.getenv("INTERACTION_RETENTION_DAYS", "180"))
+ROLLUP_SETTLE_SECONDS = float(os.getenv("ROLLUP_SETTLE_SECONDS", "300"))  # rollups skip rows younger than this
+
+# Bulk taste-vector rebuild (src/taste_rebuild.py)
+TASTE_HALF_LIFE_DAYS = float(os.getenv("TASTE_HALF_LIFE_DAYS", "90"))  # weight halves every N days
+TASTE_EVENT_WEIGHTS = {
+    "like": 1.0,
+    "dislike": -1.0,
+    "rate": 0.5,             # multiplied by (rating - 3), i.e. -1.5 .. +1.0
+    "recommend_click": 0.3,
+    "view": 0.1,
+}
+
 # config.py (add at bottom or under Miscellaneous)
 
 from pathlib import Path
@@ -52,6 +87,11 @@ from pathlib import Path
 BASE_DIR = Path(__file__).resolve().parent
 DATA_DIR = BASE_DIR / "data"   # all datasets go inside Filmoplile/data/
 MODEL_DIR = BASE_DIR / "models"
+ARCHIVE_DIR = DATA_DIR / "archive"  # compressed columnar dumps of expired interactions
+TMDB_DIR = DATA_DIR / "tmdb"        # optional local TMDb dumps (*.json / *.jsonl)
+METADATA_DB = MODEL_DIR / "metadata.sqlite"
+SHARD_DIR = MODEL_DIR / "shards"     # per-shard X slices + metadata written by src/sharding.py
+METADATA_CACHE_SIZE = 10000         # movies kept in the in-process metadata LRU
 
 # Ensure folders exist
 DATA_DIR.mkdir(exist_ok=True)
@@ -0,0 +1,386 @@
+"""
+Load / soak harness for the full app stack (auth, engine, feedback, DB) with Gemini faked.
+
+Simulated users run as threads in one process, like Streamlit sessions: each logs in
+(returning users, pre-registered before the timed run) or registers through src.auth, asks for recommendations, streams the sectioned view and
+sends like/dislike bursts through the same path as the 👍/👎 buttons
+(save_feedback + Recommender.log_interaction). gemini_recommend and Gemini intent
+parsing are replaced by in-process fakes with configurable latency.
+
+Every --report-every seconds it prints throughput, p50/p95/p99 per operation, DB write
+latency, lock errors, pool usage and RSS; the summary at the end shows memory growth
+over the run.
+
+    python loadtest.py --users 2000 --concurrency 32                       # one pass, SQLite
+    python loadtest.py --duration 1800 --tracemalloc                         # 30 min soak
+    python loadtest.py --database-url postgresql+psycopg2://localhost/filmophile_load
+    BCRYPT_ROUNDS=8 python loadtest.py --users 5000                          # cheaper hashing for big runs
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+QUERIES = [
+    None, "i feel happy", "sad", "scared", "movies like Toy Story", "space adventure robots",
+    "90s horror", "comedy before 1980", "romantic comedy", "heist thriller 2000-2010",
+    "surprise me", "animated family", "war drama", "like The Matrix", "chill",
+]
+
+
+# ---------------------------
+# Environment (before importing the app)
+# ---------------------------
+def _parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=2000, help="simulated users")
+    parser.add_argument("--concurrency", type=int, default=32, help="concurrent sessions (threads)")
+    parser.add_argument("--duration", type=float, default=0, help="soak seconds; 0 = one session per user")
+    parser.add_argument("--queries", type=int, default=3, help="recommendation requests per session")
+    parser.add_argument("--burst", type=int, default=5, help="likes/dislikes per feedback burst")
+    parser.add_argument("--returning", type=float, default=0.5,
+                        help="share of users registered before the run, so their sessions log in (bcrypt verify)")
+    parser.add_argument("--gemini-latency-ms", type=float, default=400, help="mean fake Gemini latency")
+    parser.add_argument("--database-url", default=None, help="default: fresh SQLite file in a temp dir")
+    parser.add_argument("--report-every", type=float, default=10, help="seconds between progress lines")
+    parser.add_argument("--tracemalloc", action="store_true", help="track Python allocations (slower)")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args()
+
+
+ARGS = _parse_args()
+if ARGS.database_url is None:
+    ARGS.database_url = "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="filmophile-load-"), "load.db")
+os.environ["DATABASE_URL"] = ARGS.database_url
+os.environ["GEMINI_API_KEY"] = "loadtest-fake"   # both Gemini entry points are faked below
+
+from sqlalchemy import event, text  # noqa: E402
+import src.auth as auth  # noqa: E402
+import src.gemini_api  # noqa: E402
+import src.gemini_intent  # noqa: E402
+from src.db import engine, init_db, SessionLocal, User  # noqa: E402
+from src.utils import save_feedback, get_user_preferences  # noqa: E402
+
+
+# ---------------------------
+# Fakes
+# ---------------------------
+class _ThreadSessionState(threading.local):
+    """One st.session_state per simulated session (thread) instead of Streamlit's."""
+    def __init__(self):
+        self.state = {}
+
+
+class _FakeStreamlit:
+    _local = _ThreadSessionState()
+
+    @property
+    def session_state(self):
+        return self._local.state
+
+
+auth.st = _FakeStreamlit()
+_TITLES = []
+
+
+def _gemini_sleep():
+    mean = ARGS.gemini_latency_ms / 1000.0
+    time.sleep(random.expovariate(1.0 / mean) if mean > 0 else 0)
+
+
+def fake_gemini_recommend(user_query: str, liked_movies=None, top_k: int = 7) -> list:
+    _gemini_sleep()
+    return [{"title": t, "year": None, "reason": "fake Gemini pick"} for t in random.sample(_TITLES, top_k)]
+
+
+def fake_parse_intent(query: str) -> dict:
+    _gemini_sleep()
+    return {"mode": "open", "keywords": query.split()[:3]}
+
+
+src.gemini_api.gemini_recommend = fake_gemini_recommend   # recommender imports it at call time
+src.gemini_intent.parse_intent = fake_parse_intent
+
+
+# ---------------------------
+# Metrics
+# ---------------------------
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)   # op -> [ms], whole run
+        self.window = defaultdict(list)      # op -> [ms], since last report
+        self.errors = defaultdict(int)
+        self.error_samples = {}
+        self.lock_errors = 0
+        self.write_ms = []                   # INSERT/UPDATE/DELETE statement time (lock waits show up here)
+        self.write_window = []
+
+    def record(self, op: str, ms: float):
+        with self._lock:
+            self.latencies[op].append(ms)
+            self.window[op].append(ms)
+
+    def error(self, op: str, exc: Exception):
+        msg = str(exc).lower()
+        with self._lock:
+            self.errors[op] += 1
+            self.error_samples.setdefault(op, repr(exc)[:200])
+            if "locked" in msg or "deadlock" in msg or "lock timeout" in msg or "queuepool limit" in msg:
+                self.lock_errors += 1
+
+    def write(self, ms: float):
+        with self._lock:
+            self.write_ms.append(ms)
+            self.write_window.append(ms)
+
+    def take_window(self):
+        with self._lock:
+            window, writes = self.window, self.write_window
+            self.window, self.write_window = defaultdict(list), []
+        return window, writes
+
+
+METRICS = Metrics()
+
+
+def pct(values, p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100.0 * (len(values) - 1))))]
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("t0", []).append(time.perf_counter())
+
+
+@event.listens_for(engine, "after_cursor_execute")
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    t0 = conn.info["t0"].pop()
+    if statement.lstrip()[:6].upper() in ("INSERT", "UPDATE", "DELETE"):
+        METRICS.write((time.perf_counter() - t0) * 1000)
+
+
+@event.listens_for(engine, "handle_error")
+def _on_error(ctx):
+    if ctx.connection is not None and ctx.connection.info.get("t0"):
+        ctx.connection.info["t0"].pop()
+
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as fh:
+            for line in fh:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def pg_lock_waiters() -> int:
+    """Backends currently waiting on a lock (Postgres only)."""
+    if engine.dialect.name != "postgresql":
+        return 0
+    with engine.connect() as conn:
+        return conn.execute(text("SELECT count(*) FROM pg_stat_activity WHERE wait_event_type = 'Lock'")).scalar()
+
+
+def timed(op: str, fn, *args, **kwargs):
+    t0 = time.perf_counter()
+    try:
+        result = fn(*args, **kwargs)
+    except Exception as e:
+        METRICS.error(op, e)
+        return None
+    METRICS.record(op, (time.perf_counter() - t0) * 1000)
+    return result
+
+
+def timed_auth(op: str, fn, *args):
+    """Like timed() for auth calls returning (ok, msg, ...): rejected attempts go under "<op>_failed"."""
+    t0 = time.perf_counter()
+    try:
+        result = fn(*args)
+    except Exception as e:
+        METRICS.error(op, e)
+        return None
+    METRICS.record(op if result[0] else f"{op}_failed", (time.perf_counter() - t0) * 1000)
+    return result
+
+
+# ---------------------------
+# Simulated session
+# ---------------------------
+PASSWORD = "load-user-secret"
+
+
+def seed_returning_users(run_id: str) -> int:
+    """
+    Register a --returning share of the users up front (one bcrypt hash shared by all,
+    so setup stays quick), so their sessions exercise the real login path.
+    """
+    rng = random.Random(ARGS.seed)
+    picked = [n for n in range(ARGS.users) if rng.random() < ARGS.returning]
+    if not picked:
+        return 0
+    hashed = auth.hash_password(PASSWORD)
+    with SessionLocal() as s:
+        s.add_all(
+            User(email=f"load-{run_id}-{n}@example.com", password_hash=hashed, display_name=f"Load User {n}")
+            for n in picked
+        )
+        s.commit()
+    return len(picked)
+
+
+def feedback(rec, user_id: int, movie_id: int, liked: bool):
+    """What save_feedback_and_update in streamlit_app.py does, minus the st.* messages."""
+    save_feedback(user_id, movie_id, liked)
+    rec.log_interaction(user_id=user_id, movie_id=movie_id, liked=liked)
+
+
+def run_session(rec, run_id: str, n: int, rng: random.Random):
+    auth.st.session_state.clear()
+    email, password = f"load-{run_id}-{n}@example.com", PASSWORD
+    # "login" only counts bcrypt-verified logins; first visits ("Email not found") are login_failed
+    ok = timed_auth("login", auth.login_user, email, password)
+    if not ok or not ok[0]:
+        ok = timed_auth("register", auth.register_user, email, password, f"Load User {n}")
+        if not ok or not ok[0]:
+            return
+    user_id = auth.st.session_state["user"]["id"]
+
+    for _ in range(ARGS.queries):
+        query = rng.choice(QUERIES)
+        recs = timed("recommend", rec.get_recommendations, query, user_id, 8) or []
+        if rng.random() < 0.3:
+            timed("stream", lambda: list(rec.iter_recommendations(query, user_id, 8, include_gemini=True,
+                                                                   include_similar=True)))
+        if recs and rng.random() < 0.7:
+            for r in rng.sample(recs, min(ARGS.burst, len(recs))):
+                timed("feedback", feedback, rec, user_id, int(r["movieId"]), rng.random() < 0.6)
+    timed("preferences", get_user_preferences, user_id)
+    auth.logout_user()
+
+
+# ---------------------------
+# Reporting
+# ---------------------------
+def report_loop(stop: threading.Event, t_start: float, samples: list):
+    last = time.perf_counter()
+    while not stop.wait(ARGS.report_every):
+        now = time.perf_counter()
+        window, writes = METRICS.take_window()
+        n_ops = sum(len(v) for v in window.values())
+        rss = rss_mb()
+        traced = tracemalloc.get_traced_memory()[0] / 2**20 if tracemalloc.is_tracing() else None
+        samples.append((now - t_start, rss, traced))
+        parts = [f"[{now - t_start:6.0f}s] {n_ops / (now - last):7.1f} ops/s"]
+        for op in ("recommend", "feedback", "login"):
+            if window.get(op):
+                v = window[op]
+                parts.append(f"{op} p50 {pct(v, 50):.0f} p95 {pct(v, 95):.0f} p99 {pct(v, 99):.0f} ms")
+        parts.append(f"writes p99 {pct(writes, 99):.0f} ms")
+        parts.append(f"lock errs {METRICS.lock_errors}")
+        parts.append(f"pool out {engine.pool.checkedout()}")
+        if engine.dialect.name == "postgresql":
+            parts.append(f"pg lock waiters {pg_lock_waiters()}")
+        parts.append(f"rss {rss:.0f} MB" + (f" (py {traced:.0f} MB)" if traced is not None else ""))
+        print(" | ".join(parts), flush=True)
+        last = now
+
+
+def summary(elapsed: float, samples: list, rec, snapshot0):
+    total = sum(len(v) for v in METRICS.latencies.values())
+    print("\n========== Summary ==========")
+    print(f"Database: {engine.url.render_as_string(hide_password=True)}")
+    print(f"Elapsed {elapsed:.1f}s, {total} ops, {total / max(elapsed, 1e-9):.1f} ops/s")
+    print(f"{'op':15s} {'count':>7s} {'errors':>6s} {'p50':>8s} {'p95':>8s} {'p99':>8s} {'max':>8s}  (ms)")
+    for op in sorted(set(METRICS.latencies) | set(METRICS.errors)):
+        v = METRICS.latencies.get(op, [])
+        print(f"{op:15s} {len(v):7d} {METRICS.errors.get(op, 0):6d} {pct(v, 50):8.1f} {pct(v, 95):8.1f} "
+              f"{pct(v, 99):8.1f} {max(v, default=0):8.1f}")
+    logins = METRICS.latencies.get("login", [])
+    if logins:
+        print(f"Verified logins: {len(logins)} ({len(logins) / max(elapsed, 1e-9):.1f}/s), "
+              f"p50 {pct(logins, 50):.1f} / p99 {pct(logins, 99):.1f} ms")
+    else:
+        print("Verified logins: none (use --returning > 0 or --duration so sessions log in)")
+    w = METRICS.write_ms
+    print(f"DB writes: {len(w)} statements, p50 {pct(w, 50):.1f} / p99 {pct(w, 99):.1f} / max {max(w, default=0):.1f} ms, "
+          f"lock errors {METRICS.lock_errors}")
+    for op, sample in METRICS.error_samples.items():
+        print(f"  first {op} error: {sample}")
+
+    if len(samples) >= 2:
+        (t0, rss0, py0), (t1, rss1, py1) = samples[0], samples[-1]
+        hours = max(t1 - t0, 1e-9) / 3600.0
+        print(f"RSS {rss0:.0f} → {rss1:.0f} MB ({(rss1 - rss0) / hours:+.0f} MB/h after warm-up)")
+        if py0 is not None:
+            print(f"Python heap {py0:.0f} → {py1:.0f} MB ({(py1 - py0) / hours:+.0f} MB/h)")
+    print(f"Engine caches: results {len(rec.results_cache)} entries, user versions {len(rec._user_versions)}")
+    if snapshot0 is not None:
+        print("Top allocation growth since start:")
+        for stat in tracemalloc.take_snapshot().compare_to(snapshot0, "lineno")[:8]:
+            print(f"  {stat}")
+
+
+def main() -> int:
+    from src.recommender import Recommender
+
+    random.seed(ARGS.seed)
+    init_db()
+    print(f"Building engine against {engine.url.render_as_string(hide_password=True)} …", flush=True)
+    rec = Recommender()
+    _TITLES.extend(rec.all_movies)
+
+    run_id = uuid.uuid4().hex[:8]
+    print(f"Pre-registered {seed_returning_users(run_id)} returning user(s) of {ARGS.users}.")
+    snapshot0 = None
+    if ARGS.tracemalloc:
+        tracemalloc.start(10)
+        snapshot0 = tracemalloc.take_snapshot()
+
+    stop = threading.Event()
+    samples = []
+    t_start = time.perf_counter()
+    reporter = threading.Thread(target=report_loop, args=(stop, t_start, samples), daemon=True)
+    reporter.start()
+
+    def worker(slot: int):
+        rng = random.Random(ARGS.seed * 100_003 + slot)
+        n = slot
+        while True:
+            if ARGS.duration:
+                if time.perf_counter() - t_start >= ARGS.duration:
+                    return
+                run_session(rec, run_id, rng.randrange(ARGS.users), rng)
+            else:
+                if n >= ARGS.users:
+                    return
+                run_session(rec, run_id, n, rng)
+                n += ARGS.concurrency
+
+    with ThreadPoolExecutor(max_workers=ARGS.concurrency, thread_name_prefix="load") as pool:
+        for f in [pool.submit(worker, i) for i in range(ARGS.concurrency)]:
+            f.result()
+    elapsed = time.perf_counter() - t_start
+    stop.set()
+    samples.append((elapsed, rss_mb(), tracemalloc.get_traced_memory()[0] / 2**20 if ARGS.tracemalloc else None))
+    summary(elapsed, samples, rec, snapshot0)
+    return 1 if sum(METRICS.errors.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
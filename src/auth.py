@@ -1,24 +1,64 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
 import bcrypt
 from sqlalchemy.exc import IntegrityError
 from src.db import SessionLocal, User
+from config import BCRYPT_ROUNDS, AUTH_WORKERS
 import streamlit as st
 
 MIN_PASS_LEN = 6
 
+# bcrypt releases the GIL, so running it on a small shared pool keeps other sessions'
+# reruns moving during a login storm and caps how many cores hashing can take.
+_bcrypt_pool = ThreadPoolExecutor(max_workers=max(1, AUTH_WORKERS), thread_name_prefix="bcrypt")
+
 # ---------------------------
 # Password helpers
 # ---------------------------
-def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+def hash_password(password: str, rounds: Optional[int] = None) -> str:
+    salt = bcrypt.gensalt(rounds=rounds or BCRYPT_ROUNDS)
+    return _bcrypt_pool.submit(bcrypt.hashpw, password.encode(), salt).result().decode()
 
 
 def check_password(password: str, hashed: str) -> bool:
-    return bcrypt.checkpw(password.encode(), hashed.encode())
+    return _bcrypt_pool.submit(bcrypt.checkpw, password.encode(), hashed.encode()).result()
+
+
+def _hash_rounds(hashed: str) -> int:
+    try:
+        return int(hashed.split("$")[2])   # $2b$<cost>$<salt+hash>
+    except (IndexError, ValueError):
+        return -1
 
 
 # ---------------------------
 # Auth core
 # ---------------------------
+def authenticate(email: str, password: str):
+    """
+    Check credentials without touching the Streamlit session.
+    Returns (success: bool, message: str, user: dict | None).
+    """
+    with SessionLocal() as s:
+        user = s.query(User).filter(User.email == email.lower()).first()
+        if not user:
+            return False, "Email not found", None
+        if not check_password(password, user.password_hash):
+            return False, "Invalid password", None
+
+        # Upgrade hashes made with a lower cost factor while we have the password
+        # (never downgrade: a lowered BCRYPT_ROUNDS only applies to new hashes)
+        if _hash_rounds(user.password_hash) < BCRYPT_ROUNDS:
+            user.password_hash = hash_password(password)
+            s.commit()
+
+        return True, f"Welcome back, {user.display_name}!", {
+            "id": user.id,
+            "email": user.email,
+            "display_name": user.display_name,
+        }
+
+
 def register_user(email: str, password: str, display_name: str):
     """
     Register a new user.
@@ -62,20 +102,11 @@ def login_user(email: str, password: str):
     Validate credentials and set session if success.
     Returns (success: bool, message: str).
     """
-    with SessionLocal() as s:
-        user = s.query(User).filter(User.email == email.lower()).first()
-        if not user:
-            return False, "Email not found"
-        if not check_password(password, user.password_hash):
-            return False, "Invalid password"
-
+    ok, msg, user = authenticate(email, password)
+    if ok:
         # ✅ Save in Streamlit session
-        st.session_state["user"] = {
-            "id": user.id,
-            "email": user.email,
-            "display_name": user.display_name,
-        }
-        return True, f"Welcome back, {user.display_name}!"
+        st.session_state["user"] = user
+    return ok, msg
 
 
 def get_current_user():
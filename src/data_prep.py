@@ -1,4 +1,5 @@
 import os
+import time
 import pandas as pd
 from config import DATA_DIR
 
@@ -15,14 +16,23 @@ class DataStore:
                 f"MovieLens CSVs not found in {DATA_DIR}. "
                 "Place movies.csv, ratings.csv, tags.csv, links.csv."
             )
+        self.timings = {}
+        t0 = time.perf_counter()
         self.movies = pd.read_csv(MOVIES)
         self.ratings = pd.read_csv(RATINGS)
         self.tags = pd.read_csv(TAGS)
         self.links = pd.read_csv(LINKS) if os.path.exists(LINKS) else pd.DataFrame()
+        self.timings["load"] = time.perf_counter() - t0
         self._prepare()
 
     def _prepare(self):
-        tags_agg = self.tags.groupby("movieId")["tag"].apply(lambda x: " ".join(map(str, x))).reset_index()
+        t0 = time.perf_counter()
+        tags_agg = (
+            self.tags["tag"].astype(str)
+            .groupby(self.tags["movieId"], sort=False)
+            .agg(" ".join)
+            .reset_index()
+        )
         self.movies = self.movies.merge(tags_agg, on="movieId", how="left")
         self.movies["tag"] = self.movies["tag"].fillna("")
         self.movies["text"] = (
@@ -30,9 +40,14 @@ class DataStore:
             self.movies["genres"].fillna("") + " " +
             self.movies["tag"].fillna("")
         ).str.replace("|", " ", regex=False)
+        # Release year parsed once from titles like "Heat (1995)" or "Fargo (2014-2017)"
+        self.movies["year"] = pd.to_numeric(
+            self.movies["title"].str.extract(r"\((\d{4})(?:[-–]\d{4})?\)\s*$")[0], errors="coerce"
+        )
+        self.timings["tags"] = time.perf_counter() - t0
 
     def movie_lookup(self):
-        return self.movies[["movieId", "title", "genres"]]
+        return self.movies[["movieId", "title", "genres", "year"]]
 
     def get_movie_text(self):
         return self.movies[["movieId", "text"]]
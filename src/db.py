@@ -1,7 +1,8 @@
 from sqlalchemy import (
     create_engine, Column, Integer, String, Float,
-    DateTime, Text, ForeignKey, Boolean
+    Date, DateTime, Text, ForeignKey, Boolean, Index, UniqueConstraint
 )
+from sqlalchemy import select
 from sqlalchemy.orm import declarative_base, relationship, sessionmaker
 from sqlalchemy.sql import func
 from config import DATABASE_URL   # ✅ Load from config.py
@@ -58,6 +59,10 @@ class Feedback(Base):
 
 class Interaction(Base):
     __tablename__ = "interactions"
+    __table_args__ = (
+        # keeps "recent activity for user X" an index range scan
+        Index("ix_interactions_user_created", "user_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
@@ -81,13 +86,64 @@ class UserVector(Base):
     user = relationship("User", back_populates="vector")
 
 
+class UserDailyStats(Base):
+    """Per-user, per-day, per-event rollup of the interactions table (see src/rollup.py)."""
+    __tablename__ = "user_daily_stats"
+    __table_args__ = (UniqueConstraint("user_id", "day", "event", name="uq_user_daily_stats"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, nullable=False)
+    day = Column(Date, nullable=False)
+    event = Column(String(50), nullable=False)
+    count = Column(Integer, nullable=False, default=0)
+    value_sum = Column(Float, nullable=False, default=0.0)
+
+
+class MovieDailyStats(Base):
+    """Per-movie, per-day, per-event rollup of the interactions table (see src/rollup.py)."""
+    __tablename__ = "movie_daily_stats"
+    __table_args__ = (UniqueConstraint("movie_id", "day", "event", name="uq_movie_daily_stats"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    movie_id = Column(Integer, nullable=False)
+    day = Column(Date, nullable=False)
+    event = Column(String(50), nullable=False)
+    count = Column(Integer, nullable=False, default=0)
+    value_sum = Column(Float, nullable=False, default=0.0)
+
+
+class RollupState(Base):
+    """High-water mark: the last interactions.id folded into the rollup tables."""
+    __tablename__ = "rollup_state"
+
+    name = Column(String(50), primary_key=True)
+    last_id = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+
 # ---------------------------
 # Utility
 # ---------------------------
 
+def db_now(session=None):
+    """
+    Current time from the database clock, naive, in the same convention that
+    server_default=func.now() writes created_at (UTC on SQLite, the server's session
+    time zone on Postgres). Compare created_at against this, never the app's clock.
+    """
+    if session is None:
+        with SessionLocal() as s:
+            return db_now(s)
+    now = session.scalar(select(func.now()))
+    return now.replace(tzinfo=None)   # keep the wall-clock value, as the naive column does
+
+
 def init_db():
     """Initialize database tables."""
     # 👇 This ensures all models are loaded before table creation
     import src.db   # replace with src.models if models are in another file
     Base.metadata.create_all(bind=engine)
+    # create_all skips indexes on tables that already exist
+    for index in Interaction.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
     print("✅ Database initialized (tables created).")
@@ -0,0 +1,112 @@
+import hashlib
+import json
+import numpy as np
+from pathlib import Path
+from sklearn.decomposition import TruncatedSVD
+from config import MODEL_DIR, EMBEDDING_DIM, EMBEDDING_DTYPE
+
+
+class LSAEmbedder:
+    """
+    Dense movie embeddings computed on CPU with LSA (TruncatedSVD over TF-IDF).
+    Item vectors are L2-normalized and stored as a memory-mapped float32/float16
+    matrix in MODEL_DIR, so a restart only re-opens the file instead of refitting.
+    """
+    def __init__(self, dim: int = EMBEDDING_DIM, dtype: str = EMBEDDING_DTYPE, model_dir=MODEL_DIR):
+        if dtype not in ("float32", "float16"):
+            raise ValueError(f"Unsupported embedding dtype: {dtype}")
+        self.dim = int(dim)
+        self.dtype = dtype
+        self.model_dir = Path(model_dir)
+        self.components = None   # (dim, n_features) float32, projects TF-IDF rows
+        self.vectors = None      # (n_items, dim) memmap, L2-normalized
+
+    # ---------- Paths ----------
+    @property
+    def vectors_path(self) -> Path:
+        return self.model_dir / f"lsa_{self.dim}_{self.dtype}.npy"
+
+    @property
+    def components_path(self) -> Path:
+        return self.model_dir / f"lsa_{self.dim}_components.npy"
+
+    @property
+    def meta_path(self) -> Path:
+        return self.model_dir / f"lsa_{self.dim}.json"
+
+    @staticmethod
+    def fingerprint(X, movie_ids) -> str:
+        """Identifies the TF-IDF matrix the vectors were fitted on."""
+        h = hashlib.sha1()
+        h.update(np.asarray(movie_ids, dtype=np.int64).tobytes())
+        h.update(np.asarray(X.shape, dtype=np.int64).tobytes())
+        h.update(X.indptr.tobytes())
+        h.update(X.indices.tobytes())
+        h.update(np.ascontiguousarray(X.data).tobytes())   # weights change even when the sparsity pattern does not
+        return h.hexdigest()
+
+    # ---------- Fit / Persist ----------
+    def fit(self, X, movie_ids):
+        dim = min(self.dim, X.shape[1] - 1, X.shape[0] - 1)
+        svd = TruncatedSVD(n_components=dim, random_state=42)
+        dense = svd.fit_transform(X).astype(np.float32)
+        self.components = svd.components_.astype(np.float32)
+
+        self.model_dir.mkdir(exist_ok=True)
+        out = np.lib.format.open_memmap(self.vectors_path, mode="w+", dtype=self.dtype, shape=dense.shape)
+        out[:] = self._normalize(dense)
+        out.flush()
+        del out
+        np.save(self.components_path, self.components)
+        self.meta_path.write_text(json.dumps({
+            "dim": dim,
+            "dtype": self.dtype,
+            "fingerprint": self.fingerprint(X, movie_ids),
+        }))
+        self.vectors = np.load(self.vectors_path, mmap_mode="r")
+        return self
+
+    def load(self, X, movie_ids) -> bool:
+        """Open stored vectors if they were fitted on this exact TF-IDF matrix."""
+        if not (self.vectors_path.exists() and self.components_path.exists() and self.meta_path.exists()):
+            return False
+        try:
+            meta = json.loads(self.meta_path.read_text())
+        except (OSError, ValueError):
+            return False
+        if meta.get("dtype") != self.dtype or meta.get("fingerprint") != self.fingerprint(X, movie_ids):
+            return False
+        self.components = np.load(self.components_path)
+        self.vectors = np.load(self.vectors_path, mmap_mode="r")
+        return True
+
+    @classmethod
+    def load_or_fit(cls, X, movie_ids, dim: int = EMBEDDING_DIM, dtype: str = EMBEDDING_DTYPE, model_dir=MODEL_DIR):
+        emb = cls(dim=dim, dtype=dtype, model_dir=model_dir)
+        if not emb.load(X, movie_ids):
+            emb.fit(X, movie_ids)
+        return emb
+
+    # ---------- Projection / Scoring ----------
+    @staticmethod
+    def _normalize(M: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(M, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return M / norms
+
+    def transform(self, V) -> np.ndarray:
+        """Project TF-IDF space rows (sparse or dense) into the embedding space."""
+        if hasattr(V, "toarray"):
+            dense = np.asarray(V @ self.components.T, dtype=np.float32)
+        else:
+            dense = np.atleast_2d(np.asarray(V, dtype=np.float32)) @ self.components.T
+        return self._normalize(dense)
+
+    def scores(self, q: np.ndarray, rows=None) -> np.ndarray:
+        """
+        Cosine similarity of one normalized query vector against items (optionally a subset of rows).
+        einsum rather than BLAS gemv: each row's dot product comes out bit-identical however
+        many rows are scored at once, which keeps sharded results equal to the full scan.
+        """
+        E = self.vectors if rows is None else self.vectors[rows]
+        return np.asarray(np.einsum("ij,j->i", E, q.ravel().astype(E.dtype)), dtype=np.float32)
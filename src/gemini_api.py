@@ -1,16 +1,28 @@
-import google.generativeai as genai
 import os
 import json
 import re
+import threading
 
-# Load API key
-api_key = os.getenv("GEMINI_API_KEY")
-if not api_key:
-    raise ValueError("⚠️ GEMINI_API_KEY not found! Did you create a .env file?")
+_model = None
+_model_lock = threading.Lock()
 
-# Configure Gemini
-genai.configure(api_key=api_key)
-model = genai.GenerativeModel("gemini-2.5-flash")  # use the stable supported model
+
+def get_model():
+    """
+    Configure Gemini and build the model on first use, so importing this module
+    never touches google.generativeai or requires an API key.
+    """
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                api_key = os.getenv("GEMINI_API_KEY")
+                if not api_key:
+                    raise ValueError("⚠️ GEMINI_API_KEY not found! Did you create a .env file?")
+                import google.generativeai as genai
+                genai.configure(api_key=api_key)
+                _model = genai.GenerativeModel("gemini-2.5-flash")  # use the stable supported model
+    return _model
 
 
 def _safe_json_parse(text: str):
@@ -32,7 +44,8 @@ def _safe_json_parse(text: str):
 def gemini_recommend(user_query: str, liked_movies=None, top_k: int = 7) -> list:
     """
     Ask Gemini for movie recommendations.
-    Returns a list of dicts with {title, year, reason}.
+    Returns a list of dicts with {title, year, reason}; raises if the call fails
+    (callers show the section as unavailable and don't cache it).
     """
     liked_str = ", ".join(liked_movies) if liked_movies else "None"
 
@@ -50,7 +63,7 @@ def gemini_recommend(user_query: str, liked_movies=None, top_k: int = 7) -> list
     """
 
     try:
-        response = model.generate_content(prompt)
+        response = get_model().generate_content(prompt)
         recs = _safe_json_parse(response.text.strip())
 
         clean_recs = []
@@ -62,7 +75,8 @@ def gemini_recommend(user_query: str, liked_movies=None, top_k: int = 7) -> list
             })
         return clean_recs[:top_k]
     except Exception as e:
-        return [{"title": "Could not fetch Gemini recs", "year": None, "reason": str(e)}]
+        print(f"[WARN] Gemini recommendations failed: {e!r}")
+        raise
 
 # 👇 Wrapper class for compatibility with streamlit_app.py
 class GeminiClient:
@@ -1,6 +1,6 @@
 import json
+from functools import lru_cache
 from typing import Dict, Any
-import google.generativeai as genai
 from config import GEMINI_API_KEY
 
 SYSTEM_PROMPT = """
@@ -21,9 +21,18 @@ User: 'find a sci-fi heist 2010-2015' -> {"mode":"filter","keywords":["sci-fi","
 User: 'surprise me' -> {"mode":"open"}
 """
 
+_PLACEHOLDER_KEYS = {"", "your-gemini-api-key"}   # config.py default
+
+
+def is_configured() -> bool:
+    """True when a real Gemini key is set (not empty, not the config placeholder)."""
+    return (GEMINI_API_KEY or "") not in _PLACEHOLDER_KEYS
+
+@lru_cache(maxsize=1)
 def _configure():
-    if not GEMINI_API_KEY:
+    if not is_configured():
         raise RuntimeError("GEMINI_API_KEY is missing. Add it to .env")
+    import google.generativeai as genai   # deferred: only needed for ambiguous queries
     genai.configure(api_key=GEMINI_API_KEY)
     return genai.GenerativeModel("gemini-1.5-flash")
 
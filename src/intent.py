@@ -0,0 +1,243 @@
+import re
+import threading
+from concurrent.futures import Future
+from typing import Any, Dict, Iterable, Optional, Tuple
+from src.cache import LRUCache
+
+# Mood → genres mapping
+MOOD_TO_GENRES = {
+    "happy": ["Comedy", "Animation", "Family", "Romance"],
+    "sad": ["Drama"],
+    "thrilled": ["Thriller", "Action", "Mystery"],
+    "scared": ["Horror"],
+    "nostalgic": ["Adventure", "Fantasy"],
+    "chill": ["Drama", "Romance", "Comedy"],
+}
+
+# Words users type → MovieLens genre names
+GENRE_ALIASES = {
+    "action": "Action", "adventure": "Adventure", "animation": "Animation", "animated": "Animation",
+    "cartoon": "Animation", "children": "Children", "kids": "Children", "comedy": "Comedy",
+    "comedies": "Comedy", "crime": "Crime", "documentary": "Documentary", "documentaries": "Documentary",
+    "drama": "Drama", "dramas": "Drama", "family": "Children", "fantasy": "Fantasy", "noir": "Film-Noir",
+    "horror": "Horror", "imax": "IMAX", "musical": "Musical", "musicals": "Musical", "mystery": "Mystery",
+    "romance": "Romance", "romantic": "Romance", "sci-fi": "Sci-Fi", "scifi": "Sci-Fi",
+    "science fiction": "Sci-Fi", "thriller": "Thriller", "thrillers": "Thriller", "war": "War",
+    "western": "Western", "westerns": "Western",
+}
+
+STOPWORDS = {
+    "a", "an", "the", "and", "or", "of", "for", "to", "in", "on", "with", "about", "me", "my", "i",
+    "im", "i'm", "feel", "feeling", "want", "wanna", "need", "something", "some", "show", "give",
+    "find", "recommend", "suggest", "movie", "movies", "film", "films", "watch", "good", "great",
+    "best", "please", "that", "is", "are", "from", "between", "made", "like", "would",
+}
+
+_RANGE = re.compile(r"\b((?:19|20)\d{2})\s*(?:-|–|to|and)\s*((?:19|20)\d{2})\b")
+_DECADE = re.compile(r"(?:\b((?:19|20)\d)0s|\b(\d)0s|'(\d)0s)\b")
+_BEFORE = re.compile(r"\b(?:before|pre|until|older than)\s+((?:19|20)\d{2})\b")
+_AFTER = re.compile(r"\b(?:after|since|post|newer than)\s+((?:19|20)\d{2})\b")
+_YEAR = re.compile(r"\b((?:19|20)\d{2})\b")
+# "like X" only after a noun or genre ("movies like X", "horror like X") or at the start;
+# "i feel like a comedy" is not a title
+_LIKE_NOUNS = ["movies?", "films?", "something", "stuff", "ones?", "anything", "shows?", "more", "just"]
+_LIKE_NOUNS += [re.escape(g) for g in sorted(GENRE_ALIASES, key=len, reverse=True)]
+_LIKE = re.compile(
+    rf"(?:^|\b(?:{'|'.join(_LIKE_NOUNS)})\s+)(?P<like>like)\s+(?P<title>.+)$"
+    r"|\b(?P<similar>similar to|such as)\s+(?P<similar_title>.+)$"
+)
+_OPEN = re.compile(r"^(?:surprise me|anything|whatever|random|something good)$")
+
+# Gemini fallback: answers cached per normalized query, failures/timeouts remembered for
+# REMOTE_RETRY_AFTER seconds so an ambiguous query does not pay the timeout on every call.
+# Calls run on daemon threads (at most REMOTE_MAX_INFLIGHT) so a hung call never blocks exit.
+REMOTE_RETRY_AFTER = 300
+REMOTE_MAX_INFLIGHT = 2
+_remote_cache = LRUCache(maxsize=1024)
+_remote_failed = LRUCache(maxsize=1024, ttl=REMOTE_RETRY_AFTER)
+_remote_inflight: Dict[str, Future] = {}
+_remote_lock = threading.Lock()
+
+
+def _empty_intent() -> Dict[str, Any]:
+    return {"mode": "open", "mood": None, "similar_title": None, "keywords": [],
+            "genres": [], "year_min": None, "year_max": None}
+
+
+def _in_title(q: str, year: str, titles) -> bool:
+    """True when the bare `year` is part of a catalog title written in the query ("2001: a space odyssey")."""
+    if not titles:
+        return False
+    words = q.split()
+    at = [i for i, w in enumerate(words) if year in w]
+    return any(
+        " ".join(words[i:j + 1]).strip(" .!?\"'") in titles
+        for k in at for i in range(k + 1) for j in range(k, len(words))
+    )
+
+
+def _parse_years(q: str, intent: Dict[str, Any], titles=None) -> str:
+    """Fill year_min/year_max from the query and return the query with those phrases removed."""
+    m = _RANGE.search(q)
+    if m:
+        lo, hi = sorted((int(m.group(1)), int(m.group(2))))
+        intent["year_min"], intent["year_max"] = lo, hi
+        return q[:m.start()] + q[m.end():]
+    m = _DECADE.search(q)
+    if m:
+        if m.group(1):
+            start = int(m.group(1)) * 10
+        else:
+            d = int(m.group(2) or m.group(3))
+            start = (2000 if d <= 2 else 1900) + d * 10
+        intent["year_min"], intent["year_max"] = start, start + 9
+        return q[:m.start()] + q[m.end():]
+    m = _BEFORE.search(q)
+    if m:
+        intent["year_max"] = int(m.group(1)) - 1
+        return q[:m.start()] + q[m.end():]
+    m = _AFTER.search(q)
+    if m:
+        intent["year_min"] = int(m.group(1)) + 1
+        return q[:m.start()] + q[m.end():]
+    m = _YEAR.search(q)
+    # a bare year inside "like Blade Runner 2049" or a known title is part of the title, not a filter
+    if m and not _LIKE.search(q) and not _in_title(q, m.group(1), titles):
+        intent["year_min"] = intent["year_max"] = int(m.group(1))
+        return q[:m.start()] + q[m.end():]
+    return q
+
+
+def parse_local(query: str, vocabulary: Optional[Iterable[str]] = None,
+                titles=None) -> Tuple[Dict[str, Any], bool]:
+    """
+    Rule-based intent parser (no network). Returns (intent, confident), where intent uses
+    the same keys as gemini_intent.parse_intent plus "genres". `confident` is False when
+    nothing structured was found and most keywords are unknown to `vocabulary`.
+    `titles` (normalized catalog titles) keeps years that belong to a title out of the filters.
+    """
+    intent = _empty_intent()
+    q = re.sub(r"\s+", " ", (query or "").lower()).strip()
+    if not q or _OPEN.match(q):
+        return intent, True
+
+    q = _parse_years(q, intent, titles)
+
+    m = _LIKE.search(q)
+    if m:
+        intent["similar_title"] = (m.group("title") or m.group("similar_title")).strip(" .!?\"'")
+        q = q[:m.start("like") if m.group("like") else m.start("similar")]   # keep a genre before "like"
+
+    for mood in MOOD_TO_GENRES:
+        if re.search(rf"\b{mood}\b", q):
+            intent["mood"] = mood
+            q = re.sub(rf"\b{mood}\b", " ", q)
+            break
+
+    genres = []
+    for alias in sorted(GENRE_ALIASES, key=len, reverse=True):   # "science fiction" before "fiction"
+        if re.search(rf"(?<![\w-]){re.escape(alias)}(?![\w-])", q):
+            genres.append(GENRE_ALIASES[alias])
+            q = re.sub(rf"(?<![\w-]){re.escape(alias)}(?![\w-])", " ", q)
+    if intent["mood"]:
+        genres.extend(MOOD_TO_GENRES[intent["mood"]])
+    intent["genres"] = list(dict.fromkeys(genres))
+
+    intent["keywords"] = [w for w in re.findall(r"[a-z0-9][a-z0-9'-]*", q) if w not in STOPWORDS]
+
+    if intent["similar_title"]:
+        intent["mode"] = "similar"
+    elif intent["mood"]:
+        intent["mode"] = "mood"
+    elif intent["keywords"] or intent["genres"] or intent["year_min"] or intent["year_max"]:
+        intent["mode"] = "filter"
+
+    structured = any(intent[k] for k in ("similar_title", "mood", "genres", "year_min", "year_max"))
+    if structured or not intent["keywords"] or vocabulary is None:
+        return intent, True
+    known = sum(1 for w in intent["keywords"] if w in vocabulary)
+    return intent, known * 2 >= len(intent["keywords"])
+
+
+def _remote_call(key: str, fut: Future):
+    from src.gemini_intent import parse_intent
+    try:
+        data = dict(parse_intent(key))
+    except Exception as e:
+        print(f"[WARN] Gemini intent parsing failed: {e!r}")
+        _remote_failed.put(key, True)
+        fut.set_exception(e)
+    else:
+        _remote_cache.put(key, data)
+        fut.set_result(data)
+    finally:
+        with _remote_lock:
+            _remote_inflight.pop(key, None)
+
+
+def remote_intent(query: str) -> Optional[Future]:
+    """
+    Future with Gemini's raw intent for `query` (already resolved when cached), or None
+    when Gemini is not configured, failed recently, or too many calls are in flight.
+    """
+    from src.gemini_intent import is_configured
+    key = re.sub(r"\s+", " ", (query or "").lower()).strip()
+    cached = _remote_cache.get(key)
+    if cached is not None:
+        fut = Future()
+        fut.set_result(cached)
+        return fut
+    if not key or not is_configured() or _remote_failed.get(key):
+        return None
+    with _remote_lock:
+        fut = _remote_inflight.get(key)
+        if fut is None:
+            if len(_remote_inflight) >= REMOTE_MAX_INFLIGHT:
+                return None
+            fut = _remote_inflight[key] = Future()
+            threading.Thread(target=_remote_call, args=(key, fut), daemon=True, name="intent").start()
+    return fut
+
+
+def clean_remote(data: Dict[str, Any], fallback: Dict[str, Any]) -> Dict[str, Any]:
+    intent = _empty_intent()
+    intent["mode"] = data.get("mode") if data.get("mode") in ("mood", "similar", "filter", "open") else "open"
+    mood = str(data.get("mood") or "").lower()
+    intent["mood"] = mood if mood in MOOD_TO_GENRES else None
+    intent["similar_title"] = data.get("similar_title") or None
+    kws = data.get("keywords") or []
+    intent["keywords"] = [str(k).lower() for k in (kws if isinstance(kws, list) else [kws])]
+    genres = [GENRE_ALIASES[k] for k in intent["keywords"] if k in GENRE_ALIASES]
+    if intent["mood"]:
+        genres.extend(MOOD_TO_GENRES[intent["mood"]])
+    intent["genres"] = list(dict.fromkeys(genres))
+    for key in ("year_min", "year_max"):
+        try:
+            intent[key] = int(data[key]) if data.get(key) is not None else None
+        except (TypeError, ValueError):
+            intent[key] = None
+    if intent == _empty_intent():
+        return fallback
+    return intent
+
+
+def resolve_intent(query: str, vocabulary: Optional[Iterable[str]] = None, titles=None,
+                   timeout: float = 3.0) -> Dict[str, Any]:
+    """
+    Local fast path first; Gemini's parse_intent is consulted only for ambiguous queries.
+    The caller waits up to `timeout` seconds for it (0 = don't wait: the call still runs
+    in the background and its answer is used from the cache next time). A Gemini failure
+    or timeout falls back to the local intent.
+    """
+    intent, confident = parse_local(query, vocabulary, titles)
+    if confident:
+        return intent
+    fut = remote_intent(query)
+    if fut is None or (timeout <= 0 and not fut.done()):
+        return intent
+    try:
+        return clean_remote(fut.result(timeout=timeout), intent)
+    except Exception:
+        key = re.sub(r"\s+", " ", query.lower()).strip()
+        _remote_failed.put(key, True)   # timed out: don't wait on this query again for a while
+        return intent
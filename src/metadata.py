@@ -0,0 +1,142 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import pandas as pd
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+from src.cache import LRUCache
+from config import METADATA_DB, TMDB_DIR, METADATA_CACHE_SIZE
+
+FIELDS = [
+    "movie_id", "title", "year", "genres", "imdb_id", "tmdb_id",
+    "overview", "poster_path", "runtime", "vote_average", "release_date",
+]
+TMDB_FIELDS = ["overview", "poster_path", "runtime", "vote_average", "release_date"]
+_BATCH = 500   # stays well below SQLite's bound-parameter limit
+
+
+class MetadataStore:
+    """
+    Offline movie metadata keyed by movieId, in an indexed SQLite file built from
+    movies.csv, links.csv, years parsed from titles and optional local TMDb dumps
+    (*.json / *.jsonl files in data/tmdb/ with TMDb's "id" plus overview, poster_path, ...).
+    Lookups are batched and go through an in-process LRU cache.
+    """
+    def __init__(self, path=METADATA_DB, cache_size: int = METADATA_CACHE_SIZE):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        self._cache = LRUCache(maxsize=cache_size)
+        with self._lock:
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS movies (
+                    movie_id INTEGER PRIMARY KEY,
+                    title TEXT, year INTEGER, genres TEXT,
+                    imdb_id TEXT, tmdb_id INTEGER,
+                    overview TEXT, poster_path TEXT, runtime INTEGER,
+                    vote_average REAL, release_date TEXT
+                );
+                CREATE INDEX IF NOT EXISTS ix_movies_tmdb_id ON movies (tmdb_id);
+                CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            """)
+
+    # ---------- Build ----------
+    @staticmethod
+    def _tmdb_files(tmdb_dir) -> list:
+        tmdb_dir = Path(tmdb_dir)
+        if not tmdb_dir.is_dir():
+            return []
+        return sorted(list(tmdb_dir.glob("*.json")) + list(tmdb_dir.glob("*.jsonl")))
+
+    @staticmethod
+    def _load_tmdb(files) -> pd.DataFrame:
+        records = []
+        for f in files:
+            with open(f, encoding="utf-8") as fh:
+                if f.suffix == ".jsonl":
+                    records.extend(json.loads(line) for line in fh if line.strip())
+                else:
+                    data = json.load(fh)
+                    records.extend(data if isinstance(data, list) else [data])
+        if not records:
+            return pd.DataFrame(columns=["tmdb_id"] + TMDB_FIELDS)
+        df = pd.DataFrame(records)
+        df = df.rename(columns={"id": "tmdb_id"}).reindex(columns=["tmdb_id"] + TMDB_FIELDS)
+        df["tmdb_id"] = pd.to_numeric(df["tmdb_id"], errors="coerce")
+        return df.dropna(subset=["tmdb_id"]).drop_duplicates("tmdb_id", keep="last")
+
+    def _fingerprint(self, movies: pd.DataFrame, links: pd.DataFrame, files) -> str:
+        h = hashlib.sha1()
+        h.update(pd.util.hash_pandas_object(movies[["movieId", "title", "genres"]], index=False).values.tobytes())
+        if not links.empty:
+            h.update(pd.util.hash_pandas_object(links, index=False).values.tobytes())
+        for f in files:
+            st = f.stat()
+            h.update(f"{f.name}:{st.st_size}:{st.st_mtime_ns}".encode())
+        return h.hexdigest()
+
+    def build(self, movies: pd.DataFrame, links: pd.DataFrame, tmdb_dir=TMDB_DIR, force: bool = False) -> bool:
+        """(Re)fill the store when its sources changed. `movies` needs movieId, title, genres, year."""
+        files = self._tmdb_files(tmdb_dir)
+        fingerprint = self._fingerprint(movies, links, files)
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'fingerprint'").fetchone()
+        if row and row["value"] == fingerprint and not force:
+            return False
+
+        df = movies[["movieId", "title", "genres", "year"]].rename(columns={"movieId": "movie_id"})
+        if not links.empty:
+            ln = links.rename(columns={"movieId": "movie_id", "imdbId": "imdb_id", "tmdbId": "tmdb_id"})
+            df = df.merge(ln[["movie_id", "imdb_id", "tmdb_id"]], on="movie_id", how="left")
+        else:
+            df["imdb_id"], df["tmdb_id"] = None, None
+        df["imdb_id"] = pd.to_numeric(df["imdb_id"], errors="coerce").map(
+            lambda v: f"tt{int(v):07d}" if pd.notna(v) else None
+        )
+        df["tmdb_id"] = pd.to_numeric(df["tmdb_id"], errors="coerce")
+        df = df.merge(self._load_tmdb(files), on="tmdb_id", how="left")
+
+        df = df.reindex(columns=FIELDS)
+        df = df.astype(object).where(df.notna(), None)
+        for col in ("year", "tmdb_id", "runtime"):
+            df[col] = df[col].map(lambda v: int(v) if v is not None else None)
+        rows = list(df.itertuples(index=False, name=None))
+
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM movies")
+            self._conn.executemany(
+                f"INSERT INTO movies ({', '.join(FIELDS)}) VALUES ({', '.join('?' * len(FIELDS))})", rows
+            )
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('fingerprint', ?)", (fingerprint,))
+        self._cache.clear()
+        return True
+
+    # ---------- Lookups ----------
+    def get_many(self, movie_ids: Iterable[int]) -> Dict[int, dict]:
+        """Metadata for many movies: cache hits first, one IN (...) query per batch of misses."""
+        ids = list(dict.fromkeys(int(m) for m in movie_ids))
+        found, missing = {}, []
+        for mid in ids:
+            meta = self._cache.get(mid)
+            if meta is None:
+                missing.append(mid)
+            else:
+                found[mid] = meta
+        for i in range(0, len(missing), _BATCH):
+            batch = missing[i:i + _BATCH]
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT * FROM movies WHERE movie_id IN ({', '.join('?' * len(batch))})", batch
+                ).fetchall()
+            for row in rows:
+                meta = dict(row)
+                meta["imdb_url"] = f"https://www.imdb.com/title/{meta['imdb_id']}/" if meta["imdb_id"] else None
+                self._cache.put(meta["movie_id"], meta)
+                found[meta["movie_id"]] = meta
+        return found
+
+    def get(self, movie_id: int) -> Optional[dict]:
+        return self.get_many([movie_id]).get(int(movie_id))
@@ -0,0 +1,132 @@
+import time
+import numpy as np
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+CANDIDATE_COLUMNS = ["movieId", "score"]
+
+
+class CandidateSource:
+    """
+    One candidate generator of the pipeline.
+    `generate(ctx, quota)` returns a DataFrame with at least movieId and score (higher is
+    better); at most `quota` rows are kept and the source is abandoned after `timeout` seconds.
+    Each source runs on its own pool of `workers` threads, so a hung source only ever
+    blocks its own calls.
+    """
+    def __init__(self, name: str, generate: Callable[[dict, int], pd.DataFrame],
+                 quota: int = 20, timeout: float = 2.0, weight: float = 1.0, workers: int = 4):
+        self.name = name
+        self.generate = generate
+        self.quota = quota
+        self.timeout = timeout
+        self.weight = weight
+        self.workers = workers
+
+    def __repr__(self):
+        return f"CandidateSource({self.name!r}, quota={self.quota}, timeout={self.timeout})"
+
+
+class RecommendationPipeline:
+    """
+    Two-stage recommendation: every source generates candidates concurrently, the
+    candidates are merged and de-duplicated by movieId, then a single re-rank
+    callback scores the merged frame. Each run returns a per-source trace.
+    """
+    def __init__(self, sources: List[CandidateSource]):
+        self.sources = list(sources)
+        # One long-lived pool per source: a slow remote source can fill its own pool,
+        # never the threads the local sources need
+        self._pools = {
+            src.name: ThreadPoolExecutor(max_workers=max(1, src.workers), thread_name_prefix=f"rec-{src.name}")
+            for src in self.sources
+        }
+
+    # ---------- Stage 1: candidate generation ----------
+    def _timed(self, source: CandidateSource, ctx: dict) -> Tuple[pd.DataFrame, float]:
+        t0 = time.perf_counter()
+        df = source.generate(ctx, source.quota)
+        return df, (time.perf_counter() - t0) * 1000.0
+
+    def generate(self, ctx: dict, only: Optional[Iterable[str]] = None) -> Tuple[pd.DataFrame, List[Dict]]:
+        """
+        Run all sources (or just those named in `only`); returns the merged long-format
+        frame (movieId, score, source) and the trace.
+        """
+        start = time.perf_counter()
+        sources = [src for src in self.sources if only is None or src.name in only]
+        futures = [(src, self._pools[src.name].submit(self._timed, src, ctx)) for src in sources]
+
+        frames, trace = [], []
+        for src, fut in futures:
+            remaining = max(0.0, src.timeout - (time.perf_counter() - start))
+            entry = {"source": src.name, "status": "ok", "candidates": 0, "kept": 0, "latency_ms": None}
+            try:
+                df, latency = fut.result(timeout=remaining)
+                entry["latency_ms"] = round(latency, 1)
+            except FutureTimeout:
+                fut.cancel()   # still queued behind hung calls: drop it instead of piling up
+                entry["status"] = "timeout"
+                entry["latency_ms"] = round(src.timeout * 1000.0, 1)
+                trace.append(entry)
+                continue
+            except Exception as e:
+                entry["status"] = f"error: {e}"
+                entry["latency_ms"] = round((time.perf_counter() - start) * 1000.0, 1)
+                trace.append(entry)
+                continue
+
+            if df is not None and not df.empty:
+                df = df.loc[df["movieId"].notna(), CANDIDATE_COLUMNS].head(src.quota).copy()
+                df["source"] = src.name
+                frames.append(df)
+                entry["candidates"] = len(df)
+            trace.append(entry)
+
+        if frames:
+            merged = pd.concat(frames, ignore_index=True)
+            merged["movieId"] = merged["movieId"].astype(np.int64)
+        else:
+            merged = pd.DataFrame(columns=CANDIDATE_COLUMNS + ["source"])
+        return merged, trace
+
+    # ---------- Stage 2: merge + re-rank ----------
+    def merge(self, candidates: pd.DataFrame) -> pd.DataFrame:
+        """
+        De-duplicate by movieId. Scores are max-normalized within each source, weighted,
+        and summed, so a movie proposed by several sources ranks above a single-source hit.
+        `source` is the strongest contributor, `sources` lists all of them.
+        """
+        if candidates.empty:
+            return pd.DataFrame({
+                "movieId": pd.Series(dtype=np.int64), "score": pd.Series(dtype=np.float64),
+                "source": pd.Series(dtype=object), "sources": pd.Series(dtype=object),
+            })
+        weights = {s.name: s.weight for s in self.sources}
+        c = candidates.copy()
+        top = c.groupby("source")["score"].transform("max").replace(0, 1.0)
+        c["score"] = c["score"].clip(lower=0) / top * c["source"].map(weights)
+        c = c.sort_values(["movieId", "score"], ascending=[True, False])
+        merged = c.groupby("movieId", sort=False).agg(
+            score=("score", "sum"),
+            source=("source", "first"),
+            sources=("source", lambda s: ",".join(dict.fromkeys(s))),
+        )
+        return merged.reset_index()
+
+    def run(self, ctx: dict, rerank: Callable[[pd.DataFrame, dict], pd.DataFrame], top_k: int = 10,
+            only: Optional[Iterable[str]] = None):
+        """
+        Generate → merge → rerank; returns (top_k DataFrame, trace). The rerank callback
+        also sees an empty frame, so the result has the same columns when nothing matched.
+        """
+        candidates, trace = self.generate(ctx, only=only)
+        merged = self.merge(candidates)
+        ranked = rerank(merged, ctx)
+        final = ranked.head(top_k)
+
+        kept = final["sources"].str.split(",").explode().value_counts() if not final.empty else {}
+        for entry in trace:
+            entry["kept"] = int(kept.get(entry["source"], 0))
+        return final.reset_index(drop=True), trace
@@ -1,33 +1,59 @@
+import itertools
 import json
 import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 import numpy as np
 import pandas as pd
 from typing import List, Union
-from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 from src.data_prep import DataStore
+from src.tfidf_build import build_tfidf
 from src.db import SessionLocal, Interaction, UserVector, Feedback
-from src.gemini_api import gemini_recommend  # <-- make sure this exists
-
-# Mood → genres mapping
-MOOD_TO_GENRES = {
-    "happy": ["Comedy", "Animation", "Family", "Romance"],
-    "sad": ["Drama"],
-    "thrilled": ["Thriller", "Action", "Mystery"],
-    "scared": ["Horror"],
-    "nostalgic": ["Adventure", "Fantasy"],
-    "chill": ["Drama", "Romance", "Comedy"],
+from src.pipeline import CandidateSource, RecommendationPipeline
+from src.intent import MOOD_TO_GENRES, parse_local, remote_intent, resolve_intent
+from src.cache import LRUCache
+from src.seen import SeenIndex
+from src.metadata import MetadataStore
+from config import (
+    RECOMMENDER_BACKEND, RESULT_CACHE_SIZE, RESULT_CACHE_TTL, USER_VERSIONS_SIZE, BUILD_WORKERS, BUILD_CHUNK_SIZE,
+)
+
+COLUMNS = ["movieId", "title", "genres", "score"]
+
+# Candidate source → (UI label, reason shown under the title)
+SOURCE_INFO = {
+    "tfidf": ("📝 TF-IDF", "Matches your search"),
+    "genre": ("🎭 Mood / Genre", "Fits your mood and genres"),
+    "neighbours": ("🎞️ Similar", "Similar to a movie you picked"),
+    "gemini": ("🔮 Gemini", "Suggested by Gemini"),
+    "popular": ("🔥 Popular", "Popular with other viewers"),
 }
 
 
 class Recommender:
-    def __init__(self):
+    def __init__(self, backend: str = RECOMMENDER_BACKEND):
         # Load movie metadata
         self.store = DataStore()
-        self.vectorizer = TfidfVectorizer(max_features=5000, stop_words="english")
         texts = self.store.get_movie_text()
         self.movie_ids = texts["movieId"].values
-        self.X = self.vectorizer.fit_transform(texts["text"].values)
+        self.vectorizer, self.X, tfidf_timings = build_tfidf(
+            texts["text"].values, max_features=5000, stop_words="english",
+            workers=BUILD_WORKERS or None, chunk_size=BUILD_CHUNK_SIZE,
+        )
+        self.build_timings = {**self.store.timings, **tfidf_timings}
+        print("[INFO] Engine build: " + " | ".join(f"{k} {v:.2f}s" for k, v in self.build_timings.items()))
+
+        # Similarity backend: sparse TF-IDF cosine, or dense LSA embeddings over the same X
+        if backend not in ("tfidf", "embedding"):
+            raise ValueError(f"Unknown recommender backend: {backend}")
+        self.backend = backend
+        self.embedder = None
+        if backend == "embedding":
+            from src.embeddings import LSAEmbedder
+            self.embedder = LSAEmbedder.load_or_fit(self.X, self.movie_ids)
 
         self.lookup = self.store.movie_lookup().set_index("movieId")
         pop = self.store.ratings.groupby("movieId")["rating"].count().rename("pop")
@@ -36,30 +62,93 @@ class Recommender:
         # Cold start backup
         self.all_movies = self.lookup["title"].tolist()
 
+        # movieId → row of X, and normalized title → movieId for resolving Gemini titles
+        self._row_index = pd.Index(self.movie_ids)
+        self._title_index = self._build_title_index()
+
+        # Row-aligned arrays for vectorized filtering (lookup rows follow X rows)
+        self._titles = self.lookup["title"].to_numpy()
+        self._genres = self.lookup["genres"].to_numpy()
+        self._years = self.lookup["year"].to_numpy(dtype=np.float64)
+        self._pop = self.pop.reindex(self.movie_ids).fillna(0).to_numpy(dtype=np.float64)
+        genre_dummies = self.lookup["genres"].str.get_dummies(sep="|")
+        self._genre_names = {g: i for i, g in enumerate(genre_dummies.columns)}
+        self._genre_matrix = genre_dummies.to_numpy(dtype=bool)
+
+        # Movies each user already liked/disliked, as bitsets over X rows
+        self.seen = SeenIndex(self._row_index)
+
+        # Offline metadata (year, IMDb/TMDb ids, optional TMDb dump fields)
+        self.metadata = MetadataStore()
+        self.metadata.build(self.store.movies, self.store.links)
+
+        self.pipeline = self._build_pipeline()
+        self.last_trace = []
+        self._stream_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="rec-stream")
+        # Gemini work (suggestions, waiting on a remote intent) never shares threads with local sections
+        self._gemini_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="rec-gemini")
+
+        # Result cache; per-user versions bump on feedback so stale entries are never hit
+        self.results_cache = LRUCache(maxsize=RESULT_CACHE_SIZE, ttl=RESULT_CACHE_TTL)
+        # user_id -> version, 0 = no feedback yet (cold start). Versions come from one global
+        # counter, so a user evicted and reloaded never reuses a version with cached results.
+        self._user_versions = LRUCache(maxsize=USER_VERSIONS_SIZE)
+        self._version_counter = itertools.count(1)
+        self._versions_lock = threading.Lock()
+
     # ---------- User Vector ----------
     def _get_user_vector(self, user_id: int) -> np.ndarray:
         with SessionLocal() as s:
             uv = s.query(UserVector).filter(UserVector.user_id == user_id).first()
+            n_features = len(self.vectorizer.vocabulary_)
             if uv is None:
-                return np.zeros(self.X.shape[1], dtype=np.float32)
+                return np.zeros(n_features, dtype=np.float32)
             data = json.loads(uv.vector_json)
-            v = np.zeros(self.X.shape[1], dtype=np.float32)
+            v = np.zeros(n_features, dtype=np.float32)
             for k, val in data.items():
                 k = int(k)
                 if k < v.shape[0]:
                     v[k] = float(val)
             return v
 
-    def _save_user_vector(self, user_id: int, v: np.ndarray):
-        nz = v.nonzero()[0]
-        payload = {int(i): float(v[i]) for i in nz}
+    # ---------- Result Cache ----------
+    def user_version(self, user_id) -> int:
+        """Per-user state version; 0 means no feedback or taste vector yet, so results are shared with anonymous users."""
+        if user_id is None:
+            return 0
+        version = self._user_versions.get(user_id)
+        if version is not None:
+            return version
         with SessionLocal() as s:
-            uv = s.query(UserVector).filter(UserVector.user_id == user_id).first()
-            if uv:
-                uv.vector_json = json.dumps(payload)
-            else:
-                s.add(UserVector(user_id=user_id, vector_json=json.dumps(payload)))
-            s.commit()
+            has_state = (
+                s.query(Feedback.id).filter(Feedback.user_id == user_id).first() is not None
+                or s.query(UserVector.id).filter(UserVector.user_id == user_id).first() is not None
+            )
+        with self._versions_lock:
+            version = self._user_versions.get(user_id)
+            if version is None:
+                version = next(self._version_counter) if has_state else 0
+                self._user_versions.put(user_id, version)
+            return version
+
+    def _bump_user_version(self, user_id: int):
+        with self._versions_lock:
+            self._user_versions.put(user_id, next(self._version_counter))
+
+    def _cache_key(self, user_query, user_id, top_k, section: str = "all") -> tuple:
+        q = " ".join(user_query.lower().split()) if isinstance(user_query, str) else ""
+        version = self.user_version(user_id)
+        return (section, user_id if version else None, version, q, int(top_k))
+
+    def _cached(self, key: tuple, compute):
+        """compute() -> (results, complete); results missing a source (timeout/error) are not cached."""
+        cached = self.results_cache.get(key)
+        if cached is not None:
+            return [dict(r) for r in cached]
+        results, complete = compute()
+        if complete:
+            self.results_cache.put(key, [dict(r) for r in results])
+        return results
 
     # ---------- Interaction Logging ----------
     def log_interaction(self, user_id: int, movie_id: int, liked: bool):
@@ -68,132 +157,420 @@ class Recommender:
                               event="like" if liked else "dislike",
                               value=1.0 if liked else -1.0))
             s.commit()
+        self.seen.mark(user_id, movie_id, liked)
+
+        # Recompute the user vector the way the bulk rebuild does (decayed, event-weighted,
+        # unit length), so one new like can't outweigh the rest of the profile
+        if movie_id in self._row_index:
+            from src.taste_rebuild import rebuild_user_vector
+            rebuild_user_vector(user_id, self.X, self._row_index)
+        # Bump only once the new vector is saved: a request under the new version must not
+        # cache a result built from the old one
+        self._bump_user_version(user_id)
+
+    def rebuild_user_vectors(self, **kwargs) -> int:
+        """Recompute all stored user vectors from the interactions log against the current X."""
+        from src.taste_rebuild import rebuild_user_vectors
+        n_users = rebuild_user_vectors(self.X, self.movie_ids, **kwargs)
+        # Every taste vector may have changed: forget all versions (reloads get fresh ones)
+        with self._versions_lock:
+            self._user_versions.clear()
+        self.results_cache.clear()
+        return n_users
+
+    # ---------- Similarity Backend ----------
+    def _scores(self, v, rows=None) -> np.ndarray:
+        """
+        Cosine similarity of one TF-IDF space vector (sparse row or dense user vector)
+        against all movies, or only against `rows`, using the configured backend.
+        """
+        if self.embedder is not None:
+            return self.embedder.scores(self.embedder.transform(v), rows)
+        if not hasattr(v, "toarray"):
+            v = np.asarray(v).reshape(1, -1)
+        Xr = self.X if rows is None else self.X[rows]
+        return cosine_similarity(v, Xr).ravel()
+
+    # ---------- Top-k / Filters ----------
+    @staticmethod
+    def _top_rows(scores: np.ndarray, top_k: int, mask: np.ndarray = None) -> np.ndarray:
+        """
+        Rows of the `top_k` highest scores, ordered by score desc then row asc (deterministic
+        under ties). Rows where `mask` is False are never returned.
+        """
+        if mask is not None:
+            scores = np.where(mask, scores, -np.inf)
+        k = min(int(top_k), int(np.isfinite(scores).sum()))
+        if k <= 0:
+            return np.empty(0, dtype=np.int64)
+        kth = np.partition(scores, len(scores) - k)[len(scores) - k]
+        cand = np.flatnonzero(scores >= kth)
+        return cand[np.lexsort((cand, -scores[cand]))][:k]
+
+    def _frame(self, rows: np.ndarray, scores: np.ndarray) -> pd.DataFrame:
+        return pd.DataFrame({
+            "movieId": self.movie_ids[rows].astype(np.int64),
+            "title": self._titles[rows],
+            "genres": self._genres[rows],
+            "score": scores[rows].astype(np.float64),
+        }, columns=COLUMNS)
 
-        # Update user vector
-        idx = np.where(self.movie_ids == movie_id)[0]
-        if len(idx) == 0:
-            return
-        idx = idx[0]
-        movie_vec = self.X[idx].toarray().ravel()
-        user_vec = self._get_user_vector(user_id)
-        user_vec = user_vec + movie_vec if liked else user_vec - movie_vec
-        self._save_user_vector(user_id, user_vec)
+    def genre_mask(self, genres: List[str]) -> np.ndarray:
+        cols = [self._genre_names[g] for g in genres if g in self._genre_names]
+        if not cols:
+            return np.zeros(len(self.movie_ids), dtype=bool)
+        return self._genre_matrix[:, cols].any(axis=1)
+
+    def year_mask(self, year_min=None, year_max=None) -> np.ndarray:
+        mask = np.ones(len(self.movie_ids), dtype=bool)
+        if year_min is not None:
+            mask &= self._years >= year_min   # NaN years never match a year filter
+        if year_max is not None:
+            mask &= self._years <= year_max
+        return mask
+
+    def intent_mask(self, intent: dict):
+        """Row filter implied by an intent's year range, or None when it filters nothing."""
+        if not intent or (intent.get("year_min") is None and intent.get("year_max") is None):
+            return None
+        return self.year_mask(intent.get("year_min"), intent.get("year_max"))
+
+    def unseen_mask(self, user_id=None) -> np.ndarray:
+        """Rows the user has not liked or disliked yet (None when nothing is excluded)."""
+        return self.seen.unseen_mask(user_id)
+
+    @staticmethod
+    def _combine(*masks):
+        masks = [m for m in masks if m is not None]
+        if not masks:
+            return None
+        return np.logical_and.reduce(masks) if len(masks) > 1 else masks[0]
 
     # ---------- TF-IDF / Popularity ----------
-    def similar_to(self, movie_id: int, top_k: int = 20) -> pd.DataFrame:
+    def similar_to(self, movie_id: int, top_k: int = 20, mask: np.ndarray = None) -> pd.DataFrame:
         idx = np.where(self.movie_ids == movie_id)[0][0]
-        sims = cosine_similarity(self.X[idx], self.X).ravel()
-        order = sims.argsort()[::-1]
-
-        recs = []
-        for j in order[: top_k + 1]:
-            mid = int(self.movie_ids[j])
-            if mid == movie_id:
-                continue
-            title = self.lookup.loc[mid, "title"]
-            genres = self.lookup.loc[mid, "genres"]
-            recs.append((mid, title, genres, float(sims[j])))
-        return pd.DataFrame(recs, columns=["movieId", "title", "genres", "score"])
-
-    def by_keywords(self, keywords: Union[str, List[str]], top_k: int = 50) -> pd.DataFrame:
+        sims = self._scores(self.X[idx])
+        keep = np.ones(len(sims), dtype=bool) if mask is None else mask.copy()
+        keep[idx] = False
+        return self._frame(self._top_rows(sims, top_k, keep), sims)
+
+    def by_keywords(self, keywords: Union[str, List[str]], top_k: int = 50, mask: np.ndarray = None) -> pd.DataFrame:
         if not keywords:
-            return self.by_popular(top_k)
+            return self.by_popular(top_k, mask=mask)
         if isinstance(keywords, list):
             q = " ".join(keywords)
         else:
             q = str(keywords)
         qv = self.vectorizer.transform([q])
-        sims = cosine_similarity(qv, self.X).ravel()
-        order = sims.argsort()[::-1][:top_k]
-        rows = []
-        for j in order:
-            mid = int(self.movie_ids[j])
-            title = self.lookup.loc[mid, "title"]
-            genres = self.lookup.loc[mid, "genres"]
-            rows.append((mid, title, genres, float(sims[j])))
-        return pd.DataFrame(rows, columns=["movieId", "title", "genres", "score"])
-
-    def by_genres(self, genres: List[str], top_k: int = 50) -> pd.DataFrame:
-        mask = self.lookup["genres"].apply(lambda g: any(gen in g for gen in genres))
-        df = self.lookup[mask].reset_index().copy()
-        df["score"] = 1.0
-        return df[["movieId", "title", "genres", "score"]].head(top_k)
-
-    def by_popular(self, top_k: int = 50) -> pd.DataFrame:
-        base = self.lookup.copy().join(self.pop, how="left").fillna({"pop": 0})
-        base = base.sort_values("pop", ascending=False)
-        base["score"] = base["pop"]
-        return base.reset_index()[["movieId", "title", "genres", "score"]].head(top_k)
+        sims = self._scores(qv)
+        return self._frame(self._top_rows(sims, top_k, mask), sims)
+
+    def by_genres(self, genres: List[str], top_k: int = 50, mask: np.ndarray = None) -> pd.DataFrame:
+        """Movies in any of `genres`, most popular first."""
+        keep = self.genre_mask(genres)
+        if mask is not None:
+            keep &= mask
+        return self._frame(self._top_rows(self._pop, top_k, keep), np.ones(len(keep)))
+
+    def by_popular(self, top_k: int = 50, mask: np.ndarray = None) -> pd.DataFrame:
+        return self._frame(self._top_rows(self._pop, top_k, mask), self._pop)
 
     # ---------- Personalization ----------
-    def personalize(self, user_id: int, candidates: pd.DataFrame, alpha: float = 0.7) -> pd.DataFrame:
+    def personalize(self, user_id: int, candidates: pd.DataFrame, alpha: float = 0.7,
+                    exclude_seen: bool = True) -> pd.DataFrame:
+        if exclude_seen and not candidates.empty:
+            unseen = self.unseen_mask(user_id)
+            if unseen is not None:
+                rows = self._row_index.get_indexer(candidates["movieId"].to_numpy())
+                candidates = candidates[(rows < 0) | unseen[np.maximum(rows, 0)]]
         if candidates.empty:
             return candidates
         u = self._get_user_vector(user_id)
         if np.allclose(u, 0):
             candidates["pScore"] = 0.0
         else:
-            idxs = [np.where(self.movie_ids == mid)[0][0] for mid in candidates["movieId"].values if mid in self.lookup.index]
-            if not idxs:
-                candidates["pScore"] = 0.0
-            else:
-                Xcand = self.X[idxs]
-                sims = cosine_similarity(u.reshape(1, -1), Xcand).ravel()
-                candidates = candidates.copy()
-                candidates["pScore"] = sims
+            idxs = self._row_index.get_indexer(candidates["movieId"].to_numpy())
+            candidates = candidates.copy()
+            candidates["pScore"] = 0.0
+            if (idxs >= 0).any():
+                candidates.loc[idxs >= 0, "pScore"] = self._scores(u, rows=idxs[idxs >= 0])
         candidates["final"] = (
             (1 - alpha) * candidates["score"].rank(method="dense", ascending=False) / len(candidates)
             + alpha * candidates["pScore"]
         )
         return candidates.sort_values("final", ascending=False).reset_index(drop=True)
 
+    # ---------- Candidate Sources ----------
+    @staticmethod
+    def _normalize_title(title: str) -> str:
+        """'Matrix, The (1999)' and 'The Matrix' both become 'the matrix'."""
+        t = re.sub(r"\s*\(\d{4}\)\s*$", "", str(title)).strip().lower()
+        m = re.match(r"^(.*), (the|a|an)$", t)
+        if m:
+            t = f"{m.group(2)} {m.group(1)}"
+        return t
+
+    def _build_title_index(self) -> dict:
+        index = {}
+        for mid, title in zip(self.lookup.index, self.lookup["title"]):
+            index.setdefault(self._normalize_title(title), int(mid))
+        return index
+
+    def _build_pipeline(self) -> RecommendationPipeline:
+        return RecommendationPipeline([
+            CandidateSource("tfidf", self._source_tfidf, quota=30, timeout=2.0, weight=1.0),
+            CandidateSource("genre", self._source_genre, quota=30, timeout=2.0, weight=1.0),
+            CandidateSource("neighbours", self._source_neighbours, quota=20, timeout=2.0, weight=0.9),
+            CandidateSource("gemini", self._source_gemini, quota=8, timeout=self.GEMINI_TIMEOUT, weight=0.8, workers=8),
+            CandidateSource("popular", self._source_popular, quota=30, timeout=2.0, weight=0.3),
+        ])
+
+    def _source_tfidf(self, ctx: dict, quota: int) -> pd.DataFrame:
+        keywords = ctx["intent"]["keywords"]
+        if not keywords:
+            return None
+        return self.by_keywords(keywords, top_k=quota, mask=ctx["mask"])
+
+    def _source_genre(self, ctx: dict, quota: int) -> pd.DataFrame:
+        genres = ctx["intent"]["genres"]
+        if not genres:
+            return None
+        df = self.by_genres(genres, top_k=quota, mask=ctx["mask"])
+        df["score"] = self._pop[self._row_index.get_indexer(df["movieId"].to_numpy())]
+        return df
+
+    def _source_neighbours(self, ctx: dict, quota: int) -> pd.DataFrame:
+        intent = ctx["intent"]
+        if intent["similar_title"]:
+            return self.similar_to_title(intent["similar_title"], top_k=quota, mask=ctx["mask"])
+        seed = self._title_index.get(" ".join(intent["keywords"]))   # query is itself a title
+        if seed is None and ctx.get("liked_ids"):
+            seed = ctx["liked_ids"][-1]
+        if seed is not None and seed in self._row_index:
+            return self.similar_to(seed, top_k=quota, mask=ctx["mask"])
+        return None
+
+    def _source_gemini(self, ctx: dict, quota: int) -> pd.DataFrame:
+        from src.gemini_api import gemini_recommend   # deferred: Gemini client is built on first call
+        recs = gemini_recommend(ctx.get("query") or "Suggest movies", ctx.get("liked_titles"), top_k=quota)
+        ids = [self._title_index.get(self._normalize_title(r.get("title") or "")) for r in recs]
+        mask = ctx["mask"]
+        rows = [
+            (mid, float(quota - i)) for i, mid in enumerate(ids)
+            if mid is not None and (mask is None or mask[self._row_index.get_loc(mid)])
+        ]
+        return pd.DataFrame(rows, columns=["movieId", "score"])
+
+    def _source_popular(self, ctx: dict, quota: int) -> pd.DataFrame:
+        return self.by_popular(top_k=quota, mask=ctx["mask"])
+
+    def _rerank(self, merged: pd.DataFrame, ctx: dict, alpha: float = 0.5) -> pd.DataFrame:
+        """Vectorized final score: merged source score blended with the user's taste similarity."""
+        rows = self._row_index.get_indexer(merged["movieId"].to_numpy())
+        merged = merged[rows >= 0].copy()
+        rows = rows[rows >= 0]
+        merged["title"] = self.lookup["title"].to_numpy()[rows]
+        merged["genres"] = self.lookup["genres"].to_numpy()[rows]
+
+        base = merged["score"].to_numpy(dtype=np.float64)
+        base = base / base.max() if len(base) and base.max() > 0 else base
+        u = self._get_user_vector(ctx["user_id"]) if ctx.get("user_id") is not None else None
+        if u is not None and not np.allclose(u, 0):
+            merged["pScore"] = self._scores(u, rows=rows)
+            merged["final"] = (1 - alpha) * base + alpha * merged["pScore"].to_numpy()
+        else:
+            merged["pScore"] = 0.0
+            merged["final"] = base
+        return merged.sort_values(["final", "movieId"], ascending=[False, True])
+
     # ---------- Main Wrapper ----------
     def get_recommendations(self, user_query=None, user_id=None, top_k=8):
-        results = []
+        key = self._cache_key(user_query, user_id, top_k)
+        return self._cached(key, lambda: self._compute_recommendations(user_query, user_id, top_k))
 
-        # --- Gemini Recommendations ---
-        liked_titles = []
-        if user_id:
-            with SessionLocal() as s:
-                feedbacks = s.query(Feedback).filter(Feedback.user_id == user_id, Feedback.liked == True).all()
-                liked_titles = [f"Movie {f.movie_id}" for f in feedbacks]
-
-        try:
-            gemini_recs = gemini_recommend(user_query or "Suggest movies", liked_titles, top_k=top_k//2)
-            for rec in gemini_recs:
-                rec["source"] = "🔮 Gemini"
-            results.extend(gemini_recs)
-        except Exception as e:
-            print(f"[WARN] Gemini failed: {e}")
-
-        # --- TF-IDF / Popularity Recommendations ---
-        if isinstance(user_query, str) and user_query.strip():
-            q = user_query.lower().strip()
-            if q in MOOD_TO_GENRES:
-                recs = self.by_genres(MOOD_TO_GENRES[q], top_k=top_k)
-            elif not self.lookup[self.lookup["title"].str.contains(q, case=False, na=False)].empty:
-                recs = self.similar_to_title(q, top_k=top_k)
-            else:
-                recs = self.by_keywords(q, top_k=top_k)
-        else:
-            recs = self.by_popular(top_k=top_k)
+    def _build_ctx(self, user_query, user_id, intent_timeout: float = 3.0) -> dict:
+        liked_ids = self.seen.liked(user_id)
+        query = user_query.lower().strip() if isinstance(user_query, str) and user_query.strip() else None
+        intent = resolve_intent(query or "", self.vectorizer.vocabulary_, self._title_index, timeout=intent_timeout)
+        return {
+            "query": query,
+            "intent": intent,
+            "mask": self._combine(self.intent_mask(intent), self.unseen_mask(user_id)),
+            "user_id": user_id,
+            "liked_ids": liked_ids,
+            "liked_titles": self.lookup.loc[liked_ids, "title"].tolist(),
+        }
+
+    def _compute_recommendations(self, user_query, user_id, top_k, only=None, intent_timeout: float = 3.0):
+        """(results, complete): complete is False when any source timed out or failed."""
+        ctx = self._build_ctx(user_query, user_id, intent_timeout)
+        recs, trace = self.pipeline.run(ctx, self._rerank, top_k=top_k, only=only)
+        self.last_trace = trace
+        return self._enrich(recs), all(entry["status"] == "ok" for entry in trace)
+
+    # ---------- Streaming ----------
+    LOCAL_SOURCES = ("tfidf", "genre", "neighbours", "popular")
+    GEMINI_TIMEOUT = 8.0   # seconds a Gemini suggestion call may take before its section gives up
+
+    def last_liked(self, user_id):
+        """movieId of the user's most recent like, or None."""
+        liked = self.seen.liked(user_id)
+        return liked[-1] if liked else None
 
-        if user_id is not None and not recs.empty:
-            recs = self.personalize(user_id, recs)
+    def _pending_intent(self, user_query):
+        """Gemini intent future for an ambiguous query (None when the local parse is enough)."""
+        query = user_query.lower().strip() if isinstance(user_query, str) and user_query.strip() else None
+        if query is None:
+            return None
+        _, confident = parse_local(query, self.vectorizer.vocabulary_, self._title_index)
+        return None if confident else remote_intent(query)
 
-        for _, row in recs.head(top_k//2).iterrows():
+    def _gemini_section(self, user_query, user_id, top_k) -> list:
+        from src.gemini_api import gemini_recommend
+        liked = self.seen.liked(user_id)
+        unseen = self.unseen_mask(user_id)
+        ask = top_k if unseen is None else 2 * top_k   # room for picks the user already rated
+        recs = gemini_recommend(user_query or "good movies", self.lookup.loc[liked, "title"].tolist(), top_k=ask)
+        ids = [self.resolve_title(r.get("title") or "") for r in recs]
+        if unseen is not None:
+            keep = [mid is None or unseen[self._row_index.get_loc(mid)] for mid in ids]
+            recs = [r for r, k in zip(recs, keep) if k]
+            ids = [mid for mid, k in zip(ids, keep) if k]
+        recs, ids = recs[:top_k], ids[:top_k]
+        meta = self.metadata.get_many([m for m in ids if m is not None])
+        results = []
+        for r, mid in zip(recs, ids):
+            m = meta.get(mid, {}) if mid is not None else {}
             results.append({
-                "title": row["title"],
-                "year": None,
-                "reason": "TF-IDF / Popularity",
-                "source": "📝 TF-IDF"
+                "movieId": mid,
+                "title": r.get("title"),
+                "year": r.get("year") or m.get("year"),
+                "reason": r.get("reason"),
+                "source": SOURCE_INFO["gemini"][0],
+                "imdb_url": m.get("imdb_url"),
+                "tmdb_id": m.get("tmdb_id"),
+                "overview": m.get("overview"),
             })
+        return results
+
+    def _similar_section(self, user_id, top_k) -> list:
+        seed = self.last_liked(user_id)
+        if seed is None or seed not in self._row_index:
+            return []
+        sim = self.similar_to(seed, top_k=top_k * 3, mask=self.unseen_mask(user_id))
+        sim = self.personalize(user_id, sim).head(top_k)
+        sim["source"] = "neighbours"
+        return self._enrich(sim)
 
+    def iter_recommendations(self, user_query=None, user_id=None, top_k=8,
+                             include_gemini: bool = True, include_similar: bool = True,
+                             timeout: float = 30.0):
+        """
+        Yield (section, results) as soon as each section is ready:
+          "local"   – blended local sources (TF-IDF, mood/genre, neighbours, popular) on the
+                      local intent parse; if the query is ambiguous and Gemini's intent arrives
+                      later with a different reading, "local" is yielded again, refined
+          "similar" – neighbours of the user's most recent like
+          "gemini"  – Gemini suggestions, enriched when they resolve to catalog movies
+        Local sections run on their own pool and never wait for Gemini. A section that fails
+        or does not finish within `timeout` seconds (GEMINI_TIMEOUT for Gemini) is yielded
+        as None and not cached.
+        Results use the same cache as get_recommendations.
+        """
+        now = time.monotonic()
+        intent_future = self._pending_intent(user_query)
+        local_key = "local"
+        if intent_future is not None and intent_future.done():
+            local_key, intent_future = "local+intent", None   # Gemini's reading is cached: use it directly
+        jobs = {   # section -> (pool, fn, deadline)
+            "local": (self._stream_pool, lambda: self._cached(
+                self._cache_key(user_query, user_id, top_k, local_key),
+                lambda: self._compute_recommendations(user_query, user_id, top_k, only=self.LOCAL_SOURCES,
+                                                      intent_timeout=0),
+            ), now + timeout),
+        }
+        if include_similar and user_id is not None:
+            jobs["similar"] = (self._stream_pool, lambda: self._cached(
+                self._cache_key(None, user_id, top_k, "similar"),
+                lambda: (self._similar_section(user_id, top_k), True),
+            ), now + timeout)
+        if include_gemini:
+            jobs["gemini"] = (self._gemini_pool, lambda: self._cached(
+                self._cache_key(user_query, user_id, top_k, "gemini"),
+                lambda: (self._gemini_section(user_query, user_id, top_k), True),
+            ), now + min(timeout, self.GEMINI_TIMEOUT))
+        if intent_future is not None:
+            def refine():
+                intent_future.result(timeout=max(0.0, min(timeout, self.GEMINI_TIMEOUT) - 0.1))
+                return self._cached(
+                    self._cache_key(user_query, user_id, top_k, "local+intent"),
+                    lambda: self._compute_recommendations(user_query, user_id, top_k, only=self.LOCAL_SOURCES,
+                                                          intent_timeout=0),
+                )
+            jobs["local+intent"] = (self._gemini_pool, refine, now + min(timeout, self.GEMINI_TIMEOUT))
+
+        futures = {pool.submit(fn): section for section, (pool, fn, _) in jobs.items()}
+        deadlines = {fut: jobs[section][2] for fut, section in futures.items()}
+        pending = set(futures)
+        results = {}
+        while pending:
+            done, _ = wait(pending, timeout=max(0.0, min(deadlines[f] for f in pending) - time.monotonic()),
+                           return_when=FIRST_COMPLETED)
+            for fut in done:
+                pending.discard(fut)
+                section = futures[fut]
+                try:
+                    results[section] = fut.result()
+                except Exception as e:
+                    if section == "local+intent":
+                        continue   # no Gemini reading in time: the local parse stands
+                    print(f"[WARN] {section} recommendations failed: {e}")
+                    results[section] = None
+                    yield section, None   # failed: nothing cached, nothing to rate
+                    continue
+                if section == "local+intent":
+                    if "local" in results and results[section] != results["local"]:
+                        yield "local", results[section]
+                    continue
+                if section == "local" and results.get("local+intent") is not None:
+                    results[section] = results["local+intent"]   # the refined reading beat the local one
+                yield section, results[section]
+            for fut in [f for f in pending if deadlines[f] <= time.monotonic()]:
+                pending.discard(fut)
+                fut.cancel()   # still queued behind hung Gemini calls: drop it
+                if futures[fut] != "local+intent":
+                    yield futures[fut], None
+
+    def _enrich(self, recs: pd.DataFrame) -> list:
+        """Result rows with metadata from one batched store lookup (no per-row scans or network)."""
+        if recs.empty:
+            return []
+        meta = self.metadata.get_many(recs["movieId"].tolist())
+        results = []
+        for mid, title, source in zip(recs["movieId"], recs["title"], recs["source"]):
+            label, reason = SOURCE_INFO.get(source, (source, source))
+            m = meta.get(int(mid), {})
+            results.append({
+                "movieId": int(mid),
+                "title": title,
+                "year": m.get("year"),
+                "reason": reason,
+                "source": label,
+                "imdb_url": m.get("imdb_url"),
+                "tmdb_id": m.get("tmdb_id"),
+                "overview": m.get("overview"),
+            })
         return results
 
-    def similar_to_title(self, title: str, top_k: int = 20):
-        matches = self.lookup[self.lookup["title"].str.contains(title, case=False, na=False)]
-        if matches.empty:
-            return pd.DataFrame(columns=["movieId", "title", "genres", "score"])
-        target_id = int(matches.index[0])
-        return self.similar_to(target_id, top_k=top_k)
+    def resolve_title(self, title: str):
+        """movieId for a title such as 'The Matrix (1999)' via the normalized title index, else None."""
+        return self._title_index.get(self._normalize_title(title))
+
+    def similar_to_title(self, title: str, top_k: int = 20, mask: np.ndarray = None):
+        target_id = self._title_index.get(self._normalize_title(title))
+        if target_id is None:
+            matches = self.lookup[self.lookup["title"].str.contains(title, case=False, na=False, regex=False)]
+            if matches.empty:
+                return pd.DataFrame(columns=COLUMNS)
+            target_id = int(matches.index[0])
+        return self.similar_to(target_id, top_k=top_k, mask=mask)
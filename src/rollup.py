@@ -0,0 +1,198 @@
+import os
+import numpy as np
+import pandas as pd
+from datetime import timedelta
+from pathlib import Path
+from typing import Optional, Tuple
+from sqlalchemy import select, delete, text
+from src.db import engine, SessionLocal, db_now, Interaction, UserDailyStats, MovieDailyStats, RollupState
+from config import INTERACTION_RETENTION_DAYS, ARCHIVE_DIR, ROLLUP_SETTLE_SECONDS
+
+ROLLUP_NAME = "daily_stats"
+COLUMNS = ["id", "user_id", "movie_id", "event", "value", "context", "created_at"]
+
+
+# ---------------------------
+# Helpers
+# ---------------------------
+def _insert(table):
+    if engine.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif engine.dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise RuntimeError(f"Rollups need INSERT .. ON CONFLICT, unsupported on {engine.dialect.name}")
+    return insert(table)
+
+
+def _upsert_counts(session, model, key: str, agg: pd.DataFrame):
+    """Add aggregated counts/sums onto existing (key, day, event) rows, inserting new ones."""
+    if agg.empty:
+        return
+    stmt = _insert(model.__table__)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[key, "day", "event"],
+        set_={
+            "count": model.__table__.c.count + stmt.excluded.count,
+            "value_sum": model.__table__.c.value_sum + stmt.excluded.value_sum,
+        },
+    )
+    session.execute(stmt, agg.to_dict(orient="records"))
+
+
+def _high_water_mark(session) -> int:
+    state = session.get(RollupState, ROLLUP_NAME)
+    return state.last_id if state else 0
+
+
+# ---------------------------
+# Rollups
+# ---------------------------
+def run_rollups(batch_size: int = 50_000, settle_seconds: float = ROLLUP_SETTLE_SECONDS) -> int:
+    """
+    Fold new interactions (id above the high-water mark) into user_daily_stats and
+    movie_daily_stats. Each batch and its mark commit together, so a crash never
+    double-counts. Returns the number of interactions processed.
+
+    The mark only moves past rows older than `settle_seconds`. On Postgres, ids are
+    handed out before commit, so a lower id can become visible after a higher one.
+    Stopping at the first recent row gives such transactions time to commit before
+    the mark passes their id.
+    """
+    processed = 0
+    while True:
+        with SessionLocal() as s:
+            hwm = _high_water_mark(s)
+            rows = s.execute(
+                select(Interaction.id, Interaction.user_id, Interaction.movie_id, Interaction.event,
+                       Interaction.value, Interaction.created_at)
+                .where(Interaction.id > hwm)
+                .order_by(Interaction.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                return processed
+
+            df = pd.DataFrame(rows, columns=["id", "user_id", "movie_id", "event", "value", "created_at"])
+            created = pd.to_datetime(df["created_at"])
+            now = pd.Timestamp(db_now(s))   # created_at comes from the DB clock, so compare against it
+            recent = (created > now - timedelta(seconds=settle_seconds)).to_numpy()
+            settled = len(df) if not recent.any() else int(recent.argmax())
+            if settled == 0:
+                return processed
+            df, created = df.iloc[:settled].copy(), created.iloc[:settled]
+            df["day"] = created.fillna(now).dt.date
+            df["event"] = df["event"].fillna("unknown")
+            df["value"] = pd.to_numeric(df["value"], errors="coerce").fillna(0.0)
+
+            for model, key in ((UserDailyStats, "user_id"), (MovieDailyStats, "movie_id")):
+                agg = (
+                    df[df[key].notna()]
+                    .groupby([key, "day", "event"], as_index=False)
+                    .agg(count=("id", "size"), value_sum=("value", "sum"))
+                )
+                agg[key] = agg[key].astype(int)
+                agg["count"] = agg["count"].astype(int)
+                _upsert_counts(s, model, key, agg)
+
+            state = s.get(RollupState, ROLLUP_NAME)
+            if state is None:
+                s.add(RollupState(name=ROLLUP_NAME, last_id=int(df["id"].max())))
+            else:
+                state.last_id = int(df["id"].max())
+            s.commit()
+            processed += len(df)
+            if settled < len(rows):
+                return processed
+
+
+# ---------------------------
+# Retention / Archive
+# ---------------------------
+def _to_columns(df: pd.DataFrame) -> dict:
+    """Typed column arrays for np.savez_compressed (no pickled objects)."""
+    return {
+        "id": df["id"].to_numpy(dtype=np.int64),
+        "user_id": df["user_id"].fillna(-1).to_numpy(dtype=np.int64),
+        "movie_id": df["movie_id"].fillna(-1).to_numpy(dtype=np.int64),
+        "event": df["event"].fillna("").astype(str).to_numpy(dtype=str),
+        "value": pd.to_numeric(df["value"], errors="coerce").to_numpy(dtype=np.float64),
+        "context": df["context"].fillna("").astype(str).to_numpy(dtype=str),
+        "created_at": pd.to_datetime(df["created_at"]).to_numpy(dtype="datetime64[s]"),
+    }
+
+
+def apply_retention(days: int = INTERACTION_RETENTION_DAYS, archive_dir=ARCHIVE_DIR,
+                    batch_size: int = 100_000) -> Tuple[int, list]:
+    """
+    Move raw interactions older than `days` into compressed columnar archives
+    (one .npz per batch, one array per column) and delete them from the table.
+    Only rows already folded into the rollups are touched. Returns (rows, files).
+    """
+    archive_dir = Path(archive_dir)
+    cutoff = db_now() - timedelta(days=days)
+    archived, files = 0, []
+    while True:
+        with SessionLocal() as s:
+            hwm = _high_water_mark(s)
+            rows = s.execute(
+                select(*[getattr(Interaction, c) for c in COLUMNS])
+                .where(Interaction.id <= hwm, Interaction.created_at < cutoff)
+                .order_by(Interaction.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                return archived, files
+
+            df = pd.DataFrame(rows, columns=COLUMNS)
+            lo, hi = int(df["id"].min()), int(df["id"].max())
+            archive_dir.mkdir(parents=True, exist_ok=True)
+            path = archive_dir / f"interactions_{lo:010d}_{hi:010d}.npz"
+            tmp = path.with_name(path.stem + ".tmp.npz")
+            np.savez_compressed(tmp, **_to_columns(df))
+            os.replace(tmp, path)   # archive is durable before the rows go away
+
+            s.execute(
+                delete(Interaction)
+                .where(Interaction.id >= lo, Interaction.id <= hi, Interaction.created_at < cutoff)
+                .execution_options(synchronize_session=False)
+            )
+            s.commit()
+            archived += len(df)
+            files.append(path)
+
+
+def load_archive(archive_dir=ARCHIVE_DIR) -> pd.DataFrame:
+    """Read every archived batch back into one DataFrame (same columns as the table)."""
+    frames = []
+    for path in sorted(Path(archive_dir).glob("interactions_*.npz")):
+        with np.load(path) as z:
+            frames.append(pd.DataFrame({c: z[c] for c in COLUMNS}))
+    if not frames:
+        return pd.DataFrame(columns=COLUMNS)
+    df = pd.concat(frames, ignore_index=True)
+    df[["user_id", "movie_id"]] = df[["user_id", "movie_id"]].replace(-1, pd.NA)
+    return df
+
+
+def compact():
+    """Reclaim space freed by retention (VACUUM; on Postgres also refresh planner stats)."""
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        if engine.dialect.name == "postgresql":
+            conn.execute(text("VACUUM ANALYZE interactions"))
+        else:
+            conn.execute(text("VACUUM"))
+
+
+def run_maintenance(days: Optional[int] = None):
+    """Rollups first (retention only removes rolled-up rows), then archive and compact."""
+    n_rolled = run_rollups()
+    n_archived, files = apply_retention(days if days is not None else INTERACTION_RETENTION_DAYS)
+    if n_archived:
+        compact()
+    return n_rolled, n_archived, files
+
+
+if __name__ == "__main__":
+    rolled, archived, files = run_maintenance()
+    print(f"✅ Rolled up {rolled} interactions; archived {archived} rows into {len(files)} file(s).")
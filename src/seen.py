@@ -0,0 +1,84 @@
+import threading
+import numpy as np
+import pandas as pd
+from typing import List, Optional
+from src.cache import LRUCache
+from src.db import SessionLocal, Feedback
+
+
+class SeenIndex:
+    """
+    Per-user bitsets over catalog rows of movies the user already liked or disliked,
+    plus their liked movieIds in like order. Each user is loaded from the feedback table
+    once, then kept in sync by `mark()` on every feedback write, so request-time
+    filtering is a bit unpack rather than a DB query.
+    """
+    def __init__(self, row_index: pd.Index, max_users: int = 100_000):
+        self._row_index = row_index
+        self.n_items = len(row_index)
+        self._users = LRUCache(maxsize=max_users)   # user_id -> {"bits": uint8[], "liked": [movieId]}
+        # Striped per-user locks: a mark() waits for an in-progress load of the same user
+        # instead of being lost, while loads of different users still run in parallel.
+        self._locks = [threading.Lock() for _ in range(64)]
+
+    def _lock(self, user_id: int) -> threading.Lock:
+        return self._locks[hash(user_id) % len(self._locks)]
+
+    def _load(self, user_id: int) -> dict:
+        with SessionLocal() as s:
+            rows = (
+                s.query(Feedback.movie_id, Feedback.liked)
+                .filter(Feedback.user_id == user_id)
+                .order_by(Feedback.created_at, Feedback.id)
+                .all()
+            )
+        seen = np.zeros(self.n_items, dtype=bool)
+        idx = self._row_index.get_indexer([m for m, _ in rows])
+        seen[idx[idx >= 0]] = True
+        liked = [int(m) for (m, is_liked), i in zip(rows, idx) if is_liked and i >= 0]
+        return {"bits": np.packbits(seen), "liked": liked}
+
+    def _entry(self, user_id: int) -> dict:
+        entry = self._users.get(user_id)
+        if entry is not None:
+            return entry
+        with self._lock(user_id):
+            entry = self._users.get(user_id)
+            if entry is None:
+                entry = self._load(user_id)
+                self._users.put(user_id, entry)
+        return entry
+
+    def mark(self, user_id: int, movie_id: int, liked: bool):
+        """Record a like/dislike that was just written to the feedback table."""
+        i = self._row_index.get_indexer([movie_id])[0]
+        if i < 0:
+            return
+        with self._lock(user_id):
+            entry = self._users.get(user_id)
+            if entry is None:
+                return   # not loaded yet: the next _load reads it from the DB
+            entry["bits"][i >> 3] |= np.uint8(0x80 >> (i & 7))   # np.packbits is big-endian per byte
+            if movie_id in entry["liked"]:
+                entry["liked"].remove(movie_id)
+            if liked:
+                entry["liked"].append(int(movie_id))
+
+    def seen_mask(self, user_id: int) -> np.ndarray:
+        """Boolean array over catalog rows, True where the user already gave feedback."""
+        return np.unpackbits(self._entry(user_id)["bits"], count=self.n_items).astype(bool)
+
+    def unseen_mask(self, user_id: Optional[int]) -> Optional[np.ndarray]:
+        """Rows still eligible for this user, or None when nothing needs filtering."""
+        if user_id is None:
+            return None
+        bits = self._entry(user_id)["bits"]
+        if not bits.any():
+            return None
+        return ~np.unpackbits(bits, count=self.n_items).astype(bool)
+
+    def liked(self, user_id: Optional[int]) -> List[int]:
+        """Liked movieIds in the order they were liked (oldest first)."""
+        if user_id is None:
+            return []
+        return list(self._entry(user_id)["liked"])
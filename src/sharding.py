@@ -0,0 +1,328 @@
+import heapq
+import json
+import pickle
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import List, Optional, Union
+from scipy import sparse
+from sklearn.metrics.pairwise import cosine_similarity
+from src.recommender import Recommender, COLUMNS
+from src.embeddings import LSAEmbedder
+from src.seen import SeenIndex
+from config import SHARD_COUNT, SHARD_DIR
+
+
+# ---------------------------
+# Shard
+# ---------------------------
+class Shard:
+    """
+    One contiguous slice of the catalog: global rows [start, start + n) with their own
+    TF-IDF rows (or embedding rows), titles, genres and popularity. Local top-k results
+    carry global rows so the coordinator can merge them with the single-engine ordering.
+    """
+    def __init__(self, start: int, X, movie_ids, titles, genres, pop, vectors=None):
+        self.start = int(start)
+        self.X = X
+        self.movie_ids = np.asarray(movie_ids)
+        self._titles = np.asarray(titles, dtype=object)
+        self._genres = np.asarray(genres, dtype=object)
+        self._pop = np.asarray(pop, dtype=np.float64)
+        self.vectors = vectors
+
+    # ---------- Persistence ----------
+    @staticmethod
+    def _paths(shard_dir, i: int):
+        shard_dir = Path(shard_dir)
+        return shard_dir / f"shard_{i:03d}_X.npz", shard_dir / f"shard_{i:03d}.npz"
+
+    def save(self, shard_dir, i: int, fingerprint: str):
+        x_path, meta_path = self._paths(shard_dir, i)
+        sparse.save_npz(x_path, self.X.tocsr())
+        arrays = {
+            "fingerprint": np.array(fingerprint),
+            "start": np.array(self.start),
+            "movie_ids": self.movie_ids.astype(np.int64),
+            "titles": self._titles.astype(str),
+            "genres": self._genres.astype(str),
+            "pop": self._pop,
+        }
+        if self.vectors is not None:
+            arrays["vectors"] = np.asarray(self.vectors)
+        np.savez(meta_path, **arrays)
+
+    @classmethod
+    def load(cls, shard_dir, i: int, fingerprint: str) -> "Shard":
+        """Open shard `i`; raises StaleShardsError unless it was cut from the catalog `fingerprint`."""
+        x_path, meta_path = cls._paths(shard_dir, i)
+        with np.load(meta_path) as z:
+            if "fingerprint" not in z.files or str(z["fingerprint"]) != fingerprint:
+                raise StaleShardsError(f"{meta_path} belongs to another catalog build")
+            return cls(
+                int(z["start"]), sparse.load_npz(x_path).tocsr(), z["movie_ids"], z["titles"], z["genres"],
+                z["pop"], z["vectors"] if "vectors" in z.files else None,
+            )
+
+    # ---------- Local Scoring ----------
+    def _scores(self, v, rows=None) -> np.ndarray:
+        """Same computation as Recommender._scores, over this shard's rows only."""
+        if self.vectors is not None:   # v is already the normalized embedding query
+            E = self.vectors if rows is None else self.vectors[rows]
+            return np.asarray(np.einsum("ij,j->i", E, v.ravel().astype(E.dtype)), dtype=np.float32)
+        if not hasattr(v, "toarray"):
+            v = np.asarray(v).reshape(1, -1)
+        Xr = self.X if rows is None else self.X[rows]
+        return cosine_similarity(v, Xr).ravel()
+
+    def _frame(self, rows: np.ndarray, scores: np.ndarray) -> pd.DataFrame:
+        df = pd.DataFrame({
+            "movieId": self.movie_ids[rows].astype(np.int64),
+            "title": self._titles[rows],
+            "genres": self._genres[rows],
+            "score": scores[rows].astype(np.float64),
+        }, columns=COLUMNS)
+        df["_row"] = rows + self.start
+        return df
+
+    def row(self, local_row: int):
+        return self.X[local_row]
+
+    def top_similar(self, v, top_k: int, mask: Optional[np.ndarray] = None) -> pd.DataFrame:
+        sims = self._scores(v)
+        return self._frame(Recommender._top_rows(sims, top_k, mask), sims)
+
+    def top_popular(self, top_k: int, mask: Optional[np.ndarray] = None) -> pd.DataFrame:
+        return self._frame(Recommender._top_rows(self._pop, top_k, mask), self._pop)
+
+    def score_rows(self, v, rows: np.ndarray) -> np.ndarray:
+        return self._scores(v, rows)
+
+
+class StaleShardsError(ValueError):
+    """Shards on disk were built from a different catalog / TF-IDF matrix."""
+
+
+# ---------- Worker process: one shard per process ----------
+_SHARD: Optional[Shard] = None
+
+
+def _init_worker(shard_dir: str, i: int, fingerprint: str):
+    global _SHARD
+    _SHARD = Shard.load(shard_dir, i, fingerprint)
+
+
+def _call(method: str, *args):
+    return getattr(_SHARD, method)(*args)
+
+
+# ---------------------------
+# Build
+# ---------------------------
+def build_shards(rec: Recommender, n_shards: int = SHARD_COUNT, shard_dir=SHARD_DIR) -> Path:
+    """
+    Split a built Recommender's catalog into `n_shards` contiguous row ranges and write
+    each shard plus the coordinator state (vectorizer, movie ids, shard offsets). The
+    manifest and every shard carry the catalog fingerprint (LSAEmbedder.fingerprint of
+    X and movie ids), so shards from an older build are never served.
+    """
+    shard_dir = Path(shard_dir)
+    shard_dir.mkdir(parents=True, exist_ok=True)
+    fingerprint = LSAEmbedder.fingerprint(rec.X, rec.movie_ids)
+    n = len(rec.movie_ids)
+    bounds = np.linspace(0, n, max(1, min(int(n_shards), n)) + 1).astype(np.int64)
+    vectors = rec.embedder.vectors if rec.embedder is not None else None
+    for i, (lo, hi) in enumerate(zip(bounds[:-1], bounds[1:])):
+        Shard(
+            lo, rec.X[lo:hi], rec.movie_ids[lo:hi], rec._titles[lo:hi], rec._genres[lo:hi], rec._pop[lo:hi],
+            None if vectors is None else np.asarray(vectors[lo:hi]),
+        ).save(shard_dir, i, fingerprint)
+
+    with open(shard_dir / "coordinator.pkl", "wb") as fh:
+        pickle.dump({
+            "vectorizer": rec.vectorizer,
+            "movie_ids": rec.movie_ids,
+            "components": rec.embedder.components if rec.embedder is not None else None,
+        }, fh)
+    with open(shard_dir / "manifest.json", "w") as fh:
+        json.dump({"n_shards": len(bounds) - 1, "bounds": bounds.tolist(), "backend": rec.backend,
+                   "fingerprint": fingerprint}, fh)
+    return shard_dir
+
+
+# ---------------------------
+# Coordinator
+# ---------------------------
+class ShardedRecommender:
+    """
+    Scatter-gather front for shards written by `build_shards`. Every query goes to all
+    shards (one process each when `parallel`), each returns its local top-k, and the
+    lists are heap-merged on (score desc, global row asc) – the same order as
+    Recommender._top_rows – so results are identical to the single-process engine.
+    Masks are global boolean arrays over catalog rows, as with Recommender.
+    `fingerprint` is the current catalog's (see build_shards); shards built from anything
+    else raise StaleShardsError instead of being served.
+    """
+    def __init__(self, fingerprint: str, shard_dir=SHARD_DIR, parallel: bool = True):
+        self.shard_dir = Path(shard_dir)
+        with open(self.shard_dir / "manifest.json") as fh:
+            manifest = json.load(fh)
+        if manifest.get("fingerprint") != fingerprint:
+            raise StaleShardsError(f"shards in {self.shard_dir} were built from another catalog")
+        self.fingerprint = fingerprint
+        with open(self.shard_dir / "coordinator.pkl", "rb") as fh:
+            state = pickle.load(fh)
+        self.backend = manifest["backend"]
+        self.bounds = np.asarray(manifest["bounds"], dtype=np.int64)
+        self.n_shards = int(manifest["n_shards"])
+        self.vectorizer = state["vectorizer"]
+        self.movie_ids = state["movie_ids"]
+        self._components = state["components"]
+        self._row_index = pd.Index(self.movie_ids)
+        self.seen = SeenIndex(self._row_index)
+
+        self.parallel = parallel
+        self._pools, self._shards = [], []
+        if parallel:
+            self._pools = [
+                ProcessPoolExecutor(max_workers=1, initializer=_init_worker,
+                                    initargs=(str(self.shard_dir), i, fingerprint))
+                for i in range(self.n_shards)
+            ]
+        else:
+            self._shards = [Shard.load(self.shard_dir, i, fingerprint) for i in range(self.n_shards)]
+
+    @classmethod
+    def load_or_build(cls, rec: Recommender, n_shards: int = SHARD_COUNT, shard_dir=SHARD_DIR,
+                      parallel: bool = True) -> "ShardedRecommender":
+        """Open the shards for `rec`'s catalog, rebuilding them when missing, stale or differently split."""
+        fingerprint = LSAEmbedder.fingerprint(rec.X, rec.movie_ids)
+        try:
+            with open(Path(shard_dir) / "manifest.json") as fh:
+                manifest = json.load(fh)
+            fresh = (manifest.get("fingerprint") == fingerprint and manifest.get("backend") == rec.backend
+                     and manifest.get("n_shards") == max(1, min(int(n_shards), len(rec.movie_ids))))
+        except (OSError, ValueError):
+            fresh = False
+        if not fresh:
+            build_shards(rec, n_shards, shard_dir)
+        return cls(fingerprint, shard_dir, parallel)
+
+    def close(self):
+        for pool in self._pools:
+            pool.shutdown(cancel_futures=True)
+        self._pools = []
+
+    # ---------- Scatter / Gather ----------
+    def _scatter(self, calls: dict) -> dict:
+        """Run {shard: (method, *args)} on the shards concurrently; returns {shard: result}."""
+        if not self.parallel:
+            return {i: getattr(self._shards[i], m)(*args) for i, (m, *args) in calls.items()}
+        futures = {i: self._pools[i].submit(_call, m, *args) for i, (m, *args) in calls.items()}
+        return {i: f.result() for i, f in futures.items()}
+
+    def _slice(self, mask: Optional[np.ndarray], i: int):
+        return None if mask is None else mask[self.bounds[i]:self.bounds[i + 1]]
+
+    @staticmethod
+    def _merge(frames: List[pd.DataFrame], top_k: int) -> pd.DataFrame:
+        """k-way heap merge of per-shard top-k lists, each sorted by (score desc, row asc)."""
+        streams = [
+            zip((-f["score"].to_numpy()).tolist(), f["_row"].tolist(), [s] * len(f), range(len(f)))
+            for s, f in enumerate(frames)
+        ]
+        picked = list(islice(heapq.merge(*streams), int(top_k)))
+        offsets = np.cumsum([0] + [len(f) for f in frames])
+        positions = [offsets[s] + j for _, _, s, j in picked]
+        return pd.concat(frames, ignore_index=True).iloc[positions][COLUMNS].reset_index(drop=True)
+
+    def _query_vector(self, v):
+        """TF-IDF vector as the shards score it (projected + normalized for the embedding backend)."""
+        if self._components is None:
+            return v
+        if hasattr(v, "toarray"):
+            dense = np.asarray(v @ self._components.T, dtype=np.float32)
+        else:
+            dense = np.atleast_2d(np.asarray(v, dtype=np.float32)) @ self._components.T
+        norms = np.linalg.norm(dense, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return dense / norms
+
+    def _top_similar(self, v, top_k: int, mask: Optional[np.ndarray]) -> pd.DataFrame:
+        q = self._query_vector(v)
+        parts = self._scatter({i: ("top_similar", q, top_k, self._slice(mask, i)) for i in range(self.n_shards)})
+        return self._merge([parts[i] for i in range(self.n_shards)], top_k)
+
+    def _shard_of(self, rows: np.ndarray) -> np.ndarray:
+        return np.searchsorted(self.bounds, rows, side="right") - 1
+
+    # ---------- Same API as Recommender ----------
+    def _scores(self, v, rows) -> np.ndarray:
+        """Scores for the given global rows, each routed to the shard that owns it."""
+        rows = np.asarray(rows, dtype=np.int64)
+        out = np.zeros(len(rows), dtype=np.float64)
+        owner = self._shard_of(rows)
+        q = self._query_vector(v)
+        calls = {int(i): ("score_rows", q, rows[owner == i] - self.bounds[i]) for i in np.unique(owner)}
+        for i, scores in self._scatter(calls).items():
+            out[owner == i] = scores
+        return out
+
+    def similar_to(self, movie_id: int, top_k: int = 20, mask: np.ndarray = None) -> pd.DataFrame:
+        idx = np.where(self.movie_ids == movie_id)[0][0]
+        i = int(self._shard_of(np.array([idx]))[0])
+        seed = self._scatter({i: ("row", idx - self.bounds[i])})[i]
+        keep = np.ones(len(self.movie_ids), dtype=bool) if mask is None else mask.copy()
+        keep[idx] = False
+        return self._top_similar(seed, top_k, keep)
+
+    def by_keywords(self, keywords: Union[str, List[str]], top_k: int = 50, mask: np.ndarray = None) -> pd.DataFrame:
+        if not keywords:
+            return self.by_popular(top_k, mask=mask)
+        q = " ".join(keywords) if isinstance(keywords, list) else str(keywords)
+        return self._top_similar(self.vectorizer.transform([q]), top_k, mask)
+
+    def by_popular(self, top_k: int = 50, mask: np.ndarray = None) -> pd.DataFrame:
+        parts = self._scatter({i: ("top_popular", top_k, self._slice(mask, i)) for i in range(self.n_shards)})
+        return self._merge([parts[i] for i in range(self.n_shards)], top_k)
+
+    def unseen_mask(self, user_id=None) -> np.ndarray:
+        return self.seen.unseen_mask(user_id)
+
+    _get_user_vector = Recommender._get_user_vector
+    personalize = Recommender.personalize
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Build catalog shards and check them against the single engine.")
+    parser.add_argument("--shards", type=int, default=SHARD_COUNT)
+    parser.add_argument("--no-verify", action="store_true")
+    args = parser.parse_args()
+
+    rec = Recommender()
+    build_shards(rec, args.shards)
+    print(f"✅ Wrote {args.shards} shard(s) to {SHARD_DIR}")
+    if not args.no_verify:
+        sharded = ShardedRecommender(LSAEmbedder.fingerprint(rec.X, rec.movie_ids))
+        checks = [
+            ("by_keywords", lambda e: e.by_keywords("space adventure robots", 50)),
+            ("by_popular", lambda e: e.by_popular(50)),
+            ("similar_to", lambda e: e.similar_to(int(rec.movie_ids[0]), 50)),
+            ("personalize", lambda e: e.personalize(1, e.by_keywords("comedy", 50), exclude_seen=False)),
+        ]
+        ok = True
+        for name, fn in checks:
+            expected = fn(rec)
+            t0 = time.perf_counter()
+            got = fn(sharded)
+            ms = (time.perf_counter() - t0) * 1000
+            same = expected.reset_index(drop=True).equals(got.reset_index(drop=True))
+            ok &= same
+            print(f"  {name:12s} {'identical' if same else 'MISMATCH'}  ({ms:.1f} ms sharded)")
+        sharded.close()
+        print("✅ Sharded output matches the single engine." if ok else "❌ Sharded output differs.")
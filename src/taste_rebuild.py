@@ -0,0 +1,190 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Iterator, Optional
+from scipy import sparse
+from sklearn.preprocessing import normalize
+from sqlalchemy import select
+from src.db import SessionLocal, db_now, Interaction, UserVector
+from config import TASTE_HALF_LIFE_DAYS, TASTE_EVENT_WEIGHTS
+
+COLUMNS = ["user_id", "movie_id", "event", "value", "created_at"]
+
+# Worker-process state, set once per process by _init_worker
+_X = None
+_MOVIE_INDEX = None
+
+
+# ---------------------------
+# Streaming
+# ---------------------------
+def iter_user_chunks(users_per_chunk: int = 2_000) -> Iterator[pd.DataFrame]:
+    """
+    Stream the interactions table in user-id order, `users_per_chunk` users at a time.
+    Keyset pagination keeps each read in its own short transaction, so vector writes
+    between chunks never wait on an open reader (SQLite allows one writer).
+    """
+    last_user = None
+    while True:
+        with SessionLocal() as s:
+            ids = select(Interaction.user_id).where(Interaction.movie_id.isnot(None))
+            if last_user is not None:
+                ids = ids.where(Interaction.user_id > last_user)
+            user_ids = s.execute(
+                ids.distinct().order_by(Interaction.user_id).limit(users_per_chunk)
+            ).scalars().all()
+            if not user_ids:
+                return
+            rows = s.execute(
+                select(Interaction.user_id, Interaction.movie_id, Interaction.event,
+                       Interaction.value, Interaction.created_at)
+                .where(Interaction.movie_id.isnot(None),
+                       Interaction.user_id >= user_ids[0],
+                       Interaction.user_id <= user_ids[-1])
+            ).all()
+        last_user = user_ids[-1]
+        yield pd.DataFrame(rows, columns=COLUMNS)
+
+
+# ---------------------------
+# Weighting
+# ---------------------------
+def event_weights(df: pd.DataFrame, now: datetime, half_life_days: float = TASTE_HALF_LIFE_DAYS) -> np.ndarray:
+    """Event-specific weight times exponential time decay on created_at, per row."""
+    base = df["event"].map(TASTE_EVENT_WEIGHTS).fillna(0.0).to_numpy(dtype=np.float64, copy=True)
+    is_rate = (df["event"] == "rate").to_numpy()
+    if is_rate.any():
+        ratings = pd.to_numeric(df["value"], errors="coerce").fillna(3.0).to_numpy(dtype=np.float64)
+        base[is_rate] *= ratings[is_rate] - 3.0
+
+    created = pd.to_datetime(df["created_at"])
+    age_days = ((now - created).dt.total_seconds() / 86400.0).fillna(0.0).clip(lower=0.0)
+    decay = np.power(0.5, age_days.to_numpy(dtype=np.float64) / half_life_days)
+    return base * decay
+
+
+def compute_user_vectors(df: pd.DataFrame, X, movie_index: pd.Index, now: datetime,
+                         half_life_days: float = TASTE_HALF_LIFE_DAYS):
+    """
+    Build the (users x movies) weight matrix W for a chunk and return
+    (user_ids, U) where U = normalize(W @ X), one unit-length taste vector per row
+    (all zeros for a user none of whose movies are in the catalog any more).
+    """
+    user_ids, rows_user = np.unique(df["user_id"].to_numpy(dtype=np.int64), return_inverse=True)
+    rows_movie = movie_index.get_indexer(df["movie_id"].to_numpy())
+    known = rows_movie >= 0   # users left with no catalog movies keep an all-zero row
+    W = sparse.csr_matrix(
+        (event_weights(df[known], now, half_life_days), (rows_user[known], rows_movie[known])),
+        shape=(len(user_ids), X.shape[0]),
+    )  # duplicate (user, movie) pairs are summed
+    U = normalize(W @ X, norm="l2", axis=1)
+    return user_ids, sparse.csr_matrix(U, dtype=np.float32)
+
+
+def _init_worker(X, movie_ids):
+    global _X, _MOVIE_INDEX
+    _X = X
+    _MOVIE_INDEX = pd.Index(movie_ids)
+
+
+def _compute_chunk(df: pd.DataFrame, now: datetime, half_life_days: float):
+    return compute_user_vectors(df, _X, _MOVIE_INDEX, now, half_life_days)
+
+
+def user_interactions(user_id: int) -> pd.DataFrame:
+    """One user's interactions with a movie, in the same layout as iter_user_chunks."""
+    with SessionLocal() as s:
+        rows = s.execute(
+            select(Interaction.user_id, Interaction.movie_id, Interaction.event,
+                   Interaction.value, Interaction.created_at)
+            .where(Interaction.user_id == user_id, Interaction.movie_id.isnot(None))
+        ).all()
+    return pd.DataFrame(rows, columns=COLUMNS)
+
+
+def rebuild_user_vector(user_id: int, X, movie_index: pd.Index,
+                        half_life_days: float = TASTE_HALF_LIFE_DAYS) -> np.ndarray:
+    """
+    Recompute and save one user's taste vector from their interactions, with the same
+    weights and normalization as the bulk rebuild. Returns the dense vector.
+    """
+    df = user_interactions(user_id)
+    if df.empty:
+        return np.zeros(X.shape[1], dtype=np.float32)
+    now = db_now()   # created_at is written by the DB clock
+    user_ids, U = compute_user_vectors(df, X, movie_index, now, half_life_days)
+    save_user_vectors(user_ids, U)
+    return U.toarray().ravel()
+
+
+# ---------------------------
+# Persistence
+# ---------------------------
+def save_user_vectors(user_ids: np.ndarray, U: sparse.csr_matrix):
+    """Upsert one chunk of user vectors in a single transaction (same JSON layout as TasteUpdater)."""
+    payloads = {}
+    for r, uid in enumerate(user_ids):
+        start, end = U.indptr[r], U.indptr[r + 1]
+        payloads[int(uid)] = json.dumps(
+            {int(i): float(v) for i, v in zip(U.indices[start:end], U.data[start:end])}
+        )
+    with SessionLocal() as s:
+        existing = {
+            uv.user_id: uv
+            for uv in s.query(UserVector).filter(UserVector.user_id.in_(list(payloads))).all()
+        }
+        for uid, payload in payloads.items():
+            if uid in existing:
+                existing[uid].vector_json = payload
+            else:
+                s.add(UserVector(user_id=uid, vector_json=payload))
+        s.commit()
+
+
+# ---------------------------
+# Job
+# ---------------------------
+def rebuild_user_vectors(X, movie_ids, users_per_chunk: int = 2_000, workers: Optional[int] = None,
+                         half_life_days: float = TASTE_HALF_LIFE_DAYS) -> int:
+    """
+    Replay the interactions table and rewrite every user's taste vector.
+    Chunks are computed across a process pool when workers > 1; writes stay in
+    this process. Returns the number of users rebuilt.
+    """
+    now = db_now()   # created_at is written by the DB clock
+    chunks = iter_user_chunks(users_per_chunk)
+    n_users = 0
+
+    if workers is not None and workers <= 1:
+        _init_worker(X, movie_ids)
+        for df in chunks:
+            user_ids, U = _compute_chunk(df, now, half_life_days)
+            save_user_vectors(user_ids, U)
+            n_users += len(user_ids)
+        return n_users
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(X, movie_ids)) as pool:
+        pending = []
+        for df in chunks:
+            pending.append(pool.submit(_compute_chunk, df, now, half_life_days))
+            # bound in-flight chunks so memory does not grow with the table size
+            if len(pending) >= 2 * workers:
+                user_ids, U = pending.pop(0).result()
+                save_user_vectors(user_ids, U)
+                n_users += len(user_ids)
+        for fut in pending:
+            user_ids, U = fut.result()
+            save_user_vectors(user_ids, U)
+            n_users += len(user_ids)
+    return n_users
+
+
+if __name__ == "__main__":
+    from src.recommender import Recommender
+    rec = Recommender()
+    n = rebuild_user_vectors(rec.X, rec.movie_ids)
+    print(f"✅ Rebuilt taste vectors for {n} users.")
@@ -0,0 +1,79 @@
+import os
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+from scipy import sparse
+from sklearn.feature_extraction.text import CountVectorizer, TfidfTransformer, TfidfVectorizer
+
+
+def _count_chunk(texts: Sequence[str], stop_words) -> Tuple[np.ndarray, np.ndarray, sparse.csr_matrix]:
+    """Tokenize and count one chunk: (sorted local terms, term totals, doc x local-term counts)."""
+    cv = CountVectorizer(stop_words=stop_words)
+    try:
+        C = cv.fit_transform(texts)
+    except ValueError:   # chunk with no tokens at all
+        return np.empty(0, dtype=object), np.empty(0, dtype=np.int64), sparse.csr_matrix((len(texts), 0), dtype=np.int64)
+    return cv.get_feature_names_out(), np.asarray(C.sum(axis=0)).ravel(), C.tocsr()
+
+
+def build_tfidf(texts: Sequence[str], max_features: Optional[int] = 5000, stop_words="english",
+                workers: Optional[int] = None, chunk_size: int = 20_000):
+    """
+    Fit a TfidfVectorizer equivalent to TfidfVectorizer(max_features, stop_words).fit_transform(texts),
+    counting movie chunks across a process pool:
+      1. count  – each chunk is tokenized and counted independently
+      2. merge  – chunk vocabularies/term totals are merged, top `max_features` kept
+                  (same selection as scikit-learn), chunk columns remapped
+      3. idf    – one IDF pass over the merged counts
+    Returns (vectorizer, X, timings) where timings maps stage -> seconds.
+    """
+    texts = list(texts)
+    timings: Dict[str, float] = {}
+    chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)] or [[]]
+    workers = workers or os.cpu_count() or 1
+
+    t0 = time.perf_counter()
+    if workers <= 1 or len(chunks) == 1:
+        parts = [_count_chunk(c, stop_words) for c in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+            parts = list(pool.map(_count_chunk, chunks, [stop_words] * len(chunks)))
+    timings["count"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    vocab = np.unique(np.concatenate([terms for terms, _, _ in parts]).astype(str))
+    if len(vocab) == 0:
+        raise ValueError("empty vocabulary; perhaps the documents only contain stop words")
+    tfs = np.zeros(len(vocab), dtype=np.int64)
+    local_to_global: List[np.ndarray] = []
+    for terms, counts, _ in parts:
+        idx = np.searchsorted(vocab, terms.astype(str))
+        np.add.at(tfs, idx, counts)
+        local_to_global.append(idx)
+
+    # Same pruning as CountVectorizer._limit_features on the alphabetically sorted vocabulary
+    keep = np.ones(len(vocab), dtype=bool)
+    if max_features is not None and len(vocab) > max_features:
+        keep[:] = False
+        keep[(-tfs).argsort()[:max_features]] = True
+    new_index = np.where(keep, np.cumsum(keep) - 1, -1)
+
+    blocks = []
+    for (_, _, C), idx in zip(parts, local_to_global):
+        cols = new_index[idx]
+        C = C[:, np.flatnonzero(cols >= 0)]
+        C.indices = cols[cols >= 0][C.indices]   # local column -> global kept column
+        blocks.append(sparse.csr_matrix((C.data, C.indices, C.indptr), shape=(C.shape[0], int(keep.sum()))))
+    counts = sparse.vstack(blocks, format="csr")
+    counts.sort_indices()
+    timings["merge"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    vectorizer = TfidfVectorizer(max_features=max_features, stop_words=stop_words)
+    vectorizer.vocabulary_ = {term: i for i, term in enumerate(vocab[keep])}
+    transformer = TfidfTransformer()
+    X = transformer.fit_transform(counts)
+    vectorizer.idf_ = transformer.idf_
+    timings["idf"] = time.perf_counter() - t0
+    return vectorizer, X, timings
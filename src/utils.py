@@ -1,6 +1,7 @@
 from sqlalchemy.exc import SQLAlchemyError
-from src.db import SessionLocal, Feedback, Interaction
+from src.db import SessionLocal, db_now, Feedback, Interaction
 import json
+from datetime import timedelta
 
 # -----------------------------
 # Feedback system (DB-backed)
@@ -44,6 +45,46 @@ def log_user_feedback(user_id: int, movie_id: int, feedback: str):
             session.rollback()
             raise RuntimeError(f"DB error logging feedback: {e}")
 
+def save_feedback(user_id: int, movie_id: int, liked: bool):
+    """
+    Insert or update the user's like/dislike for a movie (Feedback table only;
+    the interaction itself is logged by Recommender.log_interaction).
+    """
+    with SessionLocal() as session:
+        try:
+            fb = session.query(Feedback).filter(
+                Feedback.user_id == user_id,
+                Feedback.movie_id == movie_id
+            ).first()
+            if fb:
+                fb.liked = liked
+            else:
+                session.add(Feedback(user_id=user_id, movie_id=movie_id, liked=liked))
+            session.commit()
+        except SQLAlchemyError:
+            session.rollback()
+            raise
+
+def log_unresolved_feedback(user_id: int, title: str, liked: bool, source: str = "gemini"):
+    """
+    Record a like/dislike for a suggestion that did not resolve to a catalog movie.
+    Kept as an interaction with no movie_id and the title in its context, so it never
+    marks an unrelated catalog movie as liked or seen.
+    """
+    with SessionLocal() as session:
+        try:
+            session.add(Interaction(
+                user_id=user_id,
+                movie_id=None,
+                event="like" if liked else "dislike",
+                value=1.0 if liked else -1.0,
+                context=json.dumps({"source": source, "title": title}),
+            ))
+            session.commit()
+        except SQLAlchemyError:
+            session.rollback()
+            raise
+
 def get_user_preferences(user_id: int):
     """
     Retrieve stored preferences (likes, dislikes) for a user from DB.
@@ -64,3 +105,22 @@ def get_user_preferences(user_id: int):
             "likes": [m[0] for m in likes],
             "dislikes": [m[0] for m in dislikes]
         }
+
+def get_recent_activity(user_id: int, days: int = 30, limit: int = 50):
+    """
+    Most recent interactions of a user within `days`, newest first.
+    Served by the (user_id, created_at) index, so cost does not grow with history.
+    """
+    with SessionLocal() as session:
+        since = db_now(session) - timedelta(days=days)
+        rows = (
+            session.query(Interaction)
+            .filter(Interaction.user_id == user_id, Interaction.created_at >= since)
+            .order_by(Interaction.created_at.desc())
+            .limit(limit)
+            .all()
+        )
+        return [
+            {"movie_id": r.movie_id, "event": r.event, "value": r.value, "created_at": r.created_at}
+            for r in rows
+        ]
@@ -1,16 +1,18 @@
 # streamlit_app.py
 
 import os
+from typing import TYPE_CHECKING
 from dotenv import load_dotenv
 import streamlit as st
-import pandas as pd
 from sqlalchemy.exc import IntegrityError
-from src.recommender import Recommender
 from src.auth import register_user, login_user, get_current_user, logout_user
-from src.db import SessionLocal, Feedback
-from src.utils import get_user_preferences
+from src.utils import get_user_preferences, save_feedback, log_unresolved_feedback
 from config import APP_TITLE
-from src.gemini_api import gemini_recommend  
+
+# The engine (pandas, scikit-learn, Gemini) is imported on first use, so the
+# login page renders without loading the model.
+if TYPE_CHECKING:
+    from src.recommender import Recommender
 
 
 
@@ -26,11 +28,12 @@ st.set_page_config(page_title=APP_TITLE, layout="wide")
 st.title("🎥 Filmophile – Your AI Movie Recommender")
 
 # -----------------------------
-# Singletons (cached across reruns)
+# Singletons (shared across reruns and sessions)
 # -----------------------------
-if "rec_engine" not in st.session_state:
-    st.session_state["rec_engine"] = Recommender()
-rec_engine: Recommender = st.session_state["rec_engine"]
+@st.cache_resource(show_spinner="Loading recommendation engine…")
+def get_rec_engine() -> "Recommender":
+    from src.recommender import Recommender
+    return Recommender()
 
 # -----------------------------
 # Session Init
@@ -43,40 +46,30 @@ if "page" not in st.session_state:
 # -----------------------------
 # Helpers
 # -----------------------------
-def resolve_movie_id(rec_engine: Recommender, movie_id, title: str):
+def resolve_movie_id(rec_engine: "Recommender", movie_id, title: str):
     if movie_id is not None:
         try:
             return int(movie_id)
         except Exception:
             pass
-    try:
-        matches = rec_engine.lookup[rec_engine.lookup["title"].str.lower() == str(title).lower()]
-        if not matches.empty:
-            return int(matches.index[0])
-    except Exception:
-        pass
-    try:
-        matches = rec_engine.lookup[rec_engine.lookup["title"].str.contains(str(title), case=False, na=False)]
-        if not matches.empty:
-            return int(matches.index[0])
-    except Exception:
-        pass
-    return int(hash(title) % 100000)
+    # dict lookup, no DataFrame scan; None when the title is not in the catalog
+    return rec_engine.resolve_title(str(title))
 
-def save_feedback_and_update(user_id: int, movie_id: int, liked: bool, rec_engine: Recommender):
-    with SessionLocal() as s:
+def save_feedback_and_update(user_id: int, movie_id, liked: bool, rec_engine: "Recommender", title: str = None):
+    if movie_id is None:
+        # Not in the catalog: keep the pick by title only, never under a made-up movieId
         try:
-            fb = s.query(Feedback).filter(Feedback.user_id == user_id, Feedback.movie_id == movie_id).first()
-            if fb:
-                fb.liked = liked
-            else:
-                fb = Feedback(user_id=user_id, movie_id=movie_id, liked=liked)
-                s.add(fb)
-            s.commit()
+            log_unresolved_feedback(user_id, title, liked)
         except Exception as e:
-            s.rollback()
             st.error(f"Could not save feedback: {e}")
             return
+        st.success("Feedback saved ✅ (not in our catalog yet, so it won't change your recommendations)")
+        return
+    try:
+        save_feedback(user_id, movie_id, liked)
+    except Exception as e:
+        st.error(f"Could not save feedback: {e}")
+        return
     try:
         rec_engine.log_interaction(user_id=user_id, movie_id=movie_id, liked=liked)
     except Exception as e:
@@ -86,29 +79,30 @@ def save_feedback_and_update(user_id: int, movie_id: int, liked: bool, rec_engin
 # -----------------------------
 # UI helpers
 # -----------------------------
-def _render_movie_row(user_id: int, rec_engine: Recommender, movie_id, title: str, prefix="🎬", source="default"):
+def _render_movie_row(user_id: int, rec_engine: "Recommender", movie_id, title: str, prefix="🎬", source="default"):
     resolved_id = resolve_movie_id(rec_engine, movie_id, title)
     unique_key = f"{source}_{resolved_id}_{abs(hash(title))}"  # ✅ ensures uniqueness
 
     col1, col2, col3 = st.columns([6, 1, 1])
     with col1:
         st.write(f"{prefix} **{title}**")
+    # callbacks run before the rerun, so a click counts even if the list it came from was refined away
     with col2:
-        if st.button("👍", key=f"like_{unique_key}"):
-            save_feedback_and_update(user_id, resolved_id, liked=True, rec_engine=rec_engine)
-            st.rerun()
+        st.button("👍", key=f"like_{unique_key}", on_click=save_feedback_and_update,
+                  args=(user_id, resolved_id, True, rec_engine, title))
     with col3:
-        if st.button("👎", key=f"dislike_{unique_key}"):
-            save_feedback_and_update(user_id, resolved_id, liked=False, rec_engine=rec_engine)
-            st.rerun()
+        st.button("👎", key=f"dislike_{unique_key}", on_click=save_feedback_and_update,
+                  args=(user_id, resolved_id, False, rec_engine, title))
 
-def render_recs_list(user_id: int, rec_engine: Recommender, recs, prefix="🎬", source="default"):
+def render_recs_list(user_id: int, rec_engine: "Recommender", recs, prefix="🎬", source="default"):
     """
     Supports:
       - pandas.DataFrame with columns movieId, title
       - list[str] of titles
       - list[dict] with keys: title, year, reason
     """
+    import pandas as pd
+
     if recs is None:
         st.info("No recommendations to show.")
         return
@@ -132,10 +126,13 @@ def render_recs_list(user_id: int, rec_engine: Recommender, recs, prefix="🎬",
                 title = r.get("title", "Unknown Title")
                 year = r.get("year")
                 reason = r.get("reason")
-                display = f"{title} ({year})" if year else title
-                _render_movie_row(user_id, rec_engine, None, display, prefix, source)
-                if reason:
-                    st.caption(reason)
+                display = f"{title} ({year})" if year and str(year) not in str(title) else title
+                _render_movie_row(user_id, rec_engine, r.get("movieId"), display, prefix, source)
+                caption = " · ".join(
+                    part for part in (reason, f"[IMDb]({r['imdb_url']})" if r.get("imdb_url") else None) if part
+                )
+                if caption:
+                    st.caption(caption)
             return
         elif isinstance(recs[0], str):  # plain strings
             for title in recs:
@@ -183,6 +180,8 @@ def main_page():
         st.warning("⚠️ Please log in first.")
         st.stop()
 
+    rec_engine = get_rec_engine()
+
     st.sidebar.write(f"👋 Hello, **{user['display_name']}**")
     if st.sidebar.button("Logout"):
         logout_user()
@@ -192,63 +191,51 @@ def main_page():
     st.subheader("🔍 Find something to watch")
     query = st.text_input("Type a mood, genre or movie title (e.g., 'thriller like Inception')", key="query_main")
 
-    # Hybrid recommendations: TF-IDF + Gemini
-    if st.button("✨ Get Recommendations", key="get_recs_btn"):
-        try:
-            user_q = query.strip() if query else None
-            tfidf_recs = rec_engine.get_recommendations(user_query=user_q, user_id=user["id"], top_k=7)
-        except Exception as e:
-            st.error(f"TF-IDF Recommendation error: {e}")
-            tfidf_recs = None
+    # Hybrid recommendations, streamed: each section renders as soon as it is ready,
+    # so a slow Gemini reply never holds back the local results.
+    clicked = st.button("✨ Get Recommendations", key="get_recs_btn")
+    user_q = query.strip() if clicked and query else None
 
-        try:
-            gemini_recs = gemini_recommend(query or "good movies", top_k=7)
-        except Exception as e:
-            st.error(f"Gemini Recommendation error: {e}")
-            gemini_recs = None
-    else:
-        tfidf_recs = rec_engine.get_recommendations(user_query=None, user_id=user["id"], top_k=7)
-        gemini_recs = None
-
-    # Show TF-IDF recommendations 📊
     st.header("📊 TF-IDF Recommendations")
-    render_recs_list(user["id"], rec_engine, tfidf_recs, prefix="📊", source="tfidf")
-
-    # Divider
+    placeholders = {"local": st.empty()}
     st.divider()
-
-    # Show Gemini recommendations 🤖
-    if gemini_recs:
+    if clicked:
         st.header("🤖 Gemini AI Suggestions")
-        render_recs_list(user["id"], rec_engine, gemini_recs, prefix="🤖", source="gemini")
-
-    # Divider
-    st.divider()
-
-    # Because you liked...
-    with SessionLocal() as s:
-        last_like = (
-            s.query(Feedback)
-            .filter(Feedback.user_id == user["id"], Feedback.liked == True)
-            .order_by(Feedback.created_at.desc())
-            .first()
-        )
-    if last_like:
-        try:
-            liked_title = rec_engine.lookup.loc[last_like.movie_id, "title"]
-        except Exception:
-            liked_title = f"Movie {last_like.movie_id}"
-        st.subheader(f"💡 Because you liked **{liked_title}**")
-        try:
-            sim_df = rec_engine.similar_to(last_like.movie_id, top_k=20)
-            sim_df = rec_engine.personalize(user["id"], sim_df)
-            sim_df = rec_engine.top_n(sim_df, n=7)
-            render_recs_list(user["id"], rec_engine, sim_df, prefix="✨", source="similar")
-        except Exception:
-            st.info("No similar recommendations available.")
-
-    # Divider
-    st.divider()
+        placeholders["gemini"] = st.empty()
+        st.divider()
+    last_like = rec_engine.last_liked(user["id"])
+    if last_like is not None:
+        st.subheader(f"💡 Because you liked **{rec_engine.lookup.loc[last_like, 'title']}**")
+        placeholders["similar"] = st.empty()
+        st.divider()
+    for ph in placeholders.values():
+        ph.info("⏳ Loading…")
+
+    sections = {
+        "local": ("📊", "tfidf"),
+        "gemini": ("🤖", "gemini"),
+        "similar": ("✨", "similar"),
+    }
+    renders = {}
+    try:
+        for section, recs in rec_engine.iter_recommendations(
+            user_query=user_q, user_id=user["id"], top_k=7,
+            include_gemini=clicked, include_similar=last_like is not None,
+        ):
+            if section not in placeholders:
+                continue
+            with placeholders[section].container():
+                if recs is None:
+                    st.warning("This source is unavailable right now (failed or too slow).")
+                elif not recs:
+                    st.info("No similar recommendations available." if section == "similar"
+                            else "No recommendations found.")
+                else:
+                    prefix, source = sections[section]
+                    n = renders[section] = renders.get(section, 0) + 1   # "local" is re-sent once refined
+                    render_recs_list(user["id"], rec_engine, recs, prefix=prefix, source=f"{source}{n}")
+    except Exception as e:
+        st.error(f"Recommendation error: {e}")
 
     # Taste snapshot
     st.subheader("📊 Your Taste Profile")
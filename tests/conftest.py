@@ -0,0 +1,29 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# Point the app at a throwaway database and keep Gemini offline before anything imports config
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="filmophile-test-"), "test.db")
+os.environ["GEMINI_API_KEY"] = ""
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+@pytest.fixture(scope="session")
+def db():
+    from src.db import init_db
+    init_db()
+
+
+@pytest.fixture(scope="session")
+def rec(db):
+    import src.gemini_api
+
+    class OfflineModel:
+        def generate_content(self, prompt):
+            return type("Response", (), {"text": "[]"})()
+    src.gemini_api.get_model = lambda: OfflineModel()   # real parsing, no network
+    from src.recommender import Recommender
+    return Recommender(backend="tfidf")
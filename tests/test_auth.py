@@ -0,0 +1,35 @@
+import pytest
+
+
+@pytest.fixture
+def auth(db, monkeypatch):
+    import src.auth as auth
+    monkeypatch.setattr(auth, "st", type("FakeStreamlit", (), {"session_state": {}})())
+    return auth
+
+
+def test_login_and_logout_set_the_session_user(auth):
+    assert auth.register_user("who@example.com", "password1", "Who")[0]
+    auth.logout_user()
+    assert auth.get_current_user() is None
+    assert auth.login_user("who@example.com", "wrong-pass") == (False, "Invalid password")
+    assert auth.login_user("who@example.com", "password1")[0]
+    assert auth.get_current_user()["email"] == "who@example.com"
+    assert set(auth.st.session_state) == {"user"}
+
+
+def _stored_rounds(auth, email):
+    from src.db import SessionLocal, User
+    with SessionLocal() as s:
+        return auth._hash_rounds(s.query(User).filter(User.email == email).one().password_hash)
+
+
+def test_login_upgrades_a_lower_cost_hash_but_never_downgrades(auth, monkeypatch):
+    monkeypatch.setattr(auth, "BCRYPT_ROUNDS", 4)
+    assert auth.register_user("cost@example.com", "password1", "Cost")[0]
+    monkeypatch.setattr(auth, "BCRYPT_ROUNDS", 5)
+    assert auth.authenticate("cost@example.com", "password1")[0]
+    assert _stored_rounds(auth, "cost@example.com") == 5
+    monkeypatch.setattr(auth, "BCRYPT_ROUNDS", 4)
+    assert auth.authenticate("cost@example.com", "password1")[0]
+    assert _stored_rounds(auth, "cost@example.com") == 5
@@ -0,0 +1,52 @@
+import pytest
+
+from src.intent import parse_local
+
+TITLES = {"2001: a space odyssey", "blade runner 2049", "toy story", "inception"}
+
+
+@pytest.mark.parametrize("query, title", [
+    ("movies like inception", "inception"),
+    ("something like toy story", "toy story"),
+    ("like the matrix", "the matrix"),
+    ("films similar to heat", "heat"),
+])
+def test_like_after_noun_is_a_title(query, title):
+    intent, _ = parse_local(query, titles=TITLES)
+    assert intent["similar_title"] == title
+
+
+@pytest.mark.parametrize("query, genres, years", [
+    ("i feel like a comedy", ["Comedy"], (None, None)),
+    ("i would like a comedy from the 90s", ["Comedy"], (1990, 1999)),
+])
+def test_like_as_verb_keeps_genres(query, genres, years):
+    intent, _ = parse_local(query, titles=TITLES)
+    assert intent["similar_title"] is None
+    assert intent["genres"] == genres
+    assert (intent["year_min"], intent["year_max"]) == years
+
+
+@pytest.mark.parametrize("query", ["2001: a space odyssey", "blade runner 2049"])
+def test_year_inside_known_title_is_not_a_filter(query):
+    intent, _ = parse_local(query, titles=TITLES)
+    assert intent["year_min"] is None and intent["year_max"] is None
+
+
+def test_bare_year_is_a_filter():
+    intent, _ = parse_local("comedy 1995", titles=TITLES)
+    assert (intent["year_min"], intent["year_max"]) == (1995, 1995)
+    assert intent["genres"] == ["Comedy"]
+
+
+def test_like_as_verb_is_not_a_keyword():
+    intent, _ = parse_local("i feel like a comedy", titles=TITLES)
+    assert "like" not in intent["keywords"]
+
+
+def test_genre_before_like_keeps_the_title():
+    intent, _ = parse_local("horror like 28 days later", titles=TITLES)
+    assert intent["similar_title"] == "28 days later"
+    assert intent["genres"] == ["Horror"]
+    assert intent["keywords"] == []
+    assert intent["mode"] == "similar"
@@ -0,0 +1,64 @@
+import json
+
+import pandas as pd
+import pytest
+
+import src.metadata
+from src.metadata import MetadataStore
+
+MOVIES = pd.DataFrame({
+    "movieId": [1, 2, 3, 4, 5],
+    "title": ["Toy Story (1995)", "Jumanji (1995)", "Heat (1995)", "Casino (1995)", "Unlinked (2001)"],
+    "genres": ["Animation", "Adventure", "Crime", "Crime", "Drama"],
+    "year": [1995, 1995, 1995, 1995, 2001],
+})
+LINKS = pd.DataFrame({"movieId": [1, 2, 3, 4], "imdbId": [114709, 113497, 113277, 112641],
+                      "tmdbId": [862, 8844, 949, 524]})
+
+
+@pytest.fixture
+def store(tmp_path):
+    (tmp_path / "tmdb").mkdir()
+    (tmp_path / "tmdb" / "dump.jsonl").write_text(json.dumps({"id": 862, "runtime": 81, "overview": "Toys."}) + "\n")
+    return MetadataStore(path=tmp_path / "meta.sqlite", cache_size=100), tmp_path / "tmdb"
+
+
+def test_rebuilds_only_when_sources_change(store):
+    store, tmdb = store
+    assert store.build(MOVIES, LINKS, tmdb_dir=tmdb)
+    assert not store.build(MOVIES, LINKS, tmdb_dir=tmdb)
+    assert store.build(MOVIES, LINKS, tmdb_dir=tmdb, force=True)
+
+    renamed = MOVIES.assign(title=MOVIES["title"].replace("Heat (1995)", "Heat (1996)"))
+    assert store.build(renamed, LINKS, tmdb_dir=tmdb)
+    assert store.get(3)["title"] == "Heat (1996)"   # cache was cleared with the rebuild
+
+    (tmdb / "more.json").write_text(json.dumps([{"id": 949, "runtime": 170}]))
+    assert store.build(renamed, LINKS, tmdb_dir=tmdb)
+    assert store.get(3)["runtime"] == 170
+
+
+def test_get_many_batches_misses_and_caches(store, monkeypatch):
+    store, tmdb = store
+    store.build(MOVIES, LINKS, tmdb_dir=tmdb)
+    monkeypatch.setattr(src.metadata, "_BATCH", 2)
+    queries = []
+    store._conn.set_trace_callback(lambda sql: queries.append(sql) if sql.startswith("SELECT") else None)
+
+    found = store.get_many([1, 2, 3, 4, 5, 3, 999])
+    assert sorted(found) == [1, 2, 3, 4, 5]
+    assert len(queries) == 3   # 6 distinct ids, one IN (...) query per batch of 2
+    queries.clear()
+    assert sorted(store.get_many([5, 4, 1])) == [1, 4, 5]
+    assert queries == []       # all cache hits
+
+
+def test_imdb_url_and_tmdb_fields(store):
+    store, tmdb = store
+    store.build(MOVIES, LINKS, tmdb_dir=tmdb)
+    toy = store.get(1)
+    assert toy["imdb_id"] == "tt0114709"
+    assert toy["imdb_url"] == "https://www.imdb.com/title/tt0114709/"
+    assert toy["tmdb_id"] == 862 and toy["runtime"] == 81 and toy["overview"] == "Toys."
+    assert store.get(5)["imdb_url"] is None and store.get(5)["year"] == 2001
+    assert store.get(999) is None
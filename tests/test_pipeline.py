@@ -0,0 +1,48 @@
+import threading
+import time
+
+import pandas as pd
+
+from src.pipeline import CandidateSource, RecommendationPipeline
+
+
+def _rerank(merged, ctx):
+    merged = merged.copy()
+    merged["title"] = merged["movieId"].astype(str)
+    return merged.sort_values("score", ascending=False)
+
+
+def _fixed(ids):
+    return lambda ctx, quota: pd.DataFrame({"movieId": ids, "score": [1.0] * len(ids)})
+
+
+def test_run_with_no_candidates_keeps_rerank_columns():
+    pipe = RecommendationPipeline([CandidateSource("none", lambda ctx, quota: None)])
+    recs, trace = pipe.run({}, _rerank, top_k=5)
+    assert recs.empty
+    assert {"movieId", "score", "source", "sources", "title"} <= set(recs.columns)
+    assert trace[0]["status"] == "ok"
+
+
+def test_hung_source_does_not_starve_local_sources():
+    release = threading.Event()
+
+    def hang(ctx, quota):
+        release.wait(10)
+        return None
+
+    pipe = RecommendationPipeline([
+        CandidateSource("local", _fixed([1, 2, 3]), timeout=1.0),
+        CandidateSource("remote", hang, timeout=0.05, workers=2),
+    ])
+    try:
+        for _ in range(10):   # more hung calls than the remote pool has threads
+            pipe.generate({})
+        t0 = time.perf_counter()
+        candidates, trace = pipe.generate({})
+        status = {t["source"]: t["status"] for t in trace}
+        assert status == {"local": "ok", "remote": "timeout"}
+        assert sorted(candidates["movieId"]) == [1, 2, 3]
+        assert time.perf_counter() - t0 < 0.5
+    finally:
+        release.set()
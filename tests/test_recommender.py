@@ -0,0 +1,158 @@
+import pytest
+
+
+@pytest.mark.parametrize("query", ["movies after 2030", "comedy 2035"])
+def test_query_matching_nothing_returns_empty_list(rec, query):
+    assert rec.get_recommendations(query, top_k=5) == []
+
+
+def test_recommendations_have_titles(rec):
+    recs = rec.get_recommendations("toy story", top_k=5)
+    assert recs and all(r["title"] for r in recs)
+
+
+def test_title_with_year_is_not_filtered_by_it(rec):
+    recs = rec.get_recommendations("2001: a space odyssey", top_k=5)
+    assert recs and any(r["year"] != 2001 for r in recs)
+
+
+def test_feedback_and_rebuild_invalidate_cached_results(db, rec):
+    from src.db import SessionLocal, User
+    with SessionLocal() as s:
+        user = User(email="versions@example.com", password_hash="x", display_name="V")
+        s.add(user)
+        s.commit()
+        uid = user.id
+
+    v0 = rec.user_version(uid)
+    assert v0 == 0   # cold start shares anonymous results
+    rec.log_interaction(uid, int(rec.movie_ids[0]), True)
+    v1 = rec.user_version(uid)
+    assert v1 != v0
+
+    rec.get_recommendations("comedy", uid, top_k=3)
+    assert len(rec.results_cache)
+    rec.rebuild_user_vectors(workers=1)
+    assert len(rec.results_cache) == 0
+    assert rec.user_version(uid) not in (v0, v1)
+
+
+def test_streaming_local_section_does_not_wait_for_gemini(db, rec, monkeypatch):
+    import threading
+    import time
+    from concurrent.futures import Future
+    import src.gemini_api
+    import src.recommender
+
+    release = threading.Event()
+    monkeypatch.setattr(src.gemini_api, "gemini_recommend", lambda *a, **k: release.wait(5) and [])
+    monkeypatch.setattr(src.recommender, "remote_intent", lambda query: Future())   # intent never arrives
+    monkeypatch.setattr(rec, "GEMINI_TIMEOUT", 0.5)
+    try:
+        t0 = time.monotonic()
+        seen = {}
+        for section, recs in rec.iter_recommendations("zxqv blorf", top_k=3, include_similar=False):
+            seen.setdefault(section, (time.monotonic() - t0, recs))
+        assert seen["local"][0] < 0.5 and seen["local"][1] is not None
+        assert seen["gemini"][1] is None
+    finally:
+        release.set()
+
+
+def test_gemini_section_skips_rated_movies(db, rec, monkeypatch):
+    import src.gemini_api
+    from src.db import SessionLocal, User
+    with SessionLocal() as s:
+        user = User(email="gemini-seen@example.com", password_hash="x", display_name="G")
+        s.add(user)
+        s.commit()
+        uid = user.id
+    from src.utils import save_feedback
+    rated = int(rec.movie_ids[1])
+    save_feedback(uid, rated, False)
+    rec.log_interaction(uid, rated, False)
+    titles = [rec.lookup.loc[int(m), "title"] for m in rec.movie_ids[1:5]]
+    monkeypatch.setattr(src.gemini_api, "gemini_recommend",
+                        lambda q, liked=None, top_k=7: [{"title": t} for t in titles][:top_k])
+    recs = rec._gemini_section("anything", uid, 3)
+    assert len(recs) == 3 and rated not in [r.get("movieId") for r in recs]
+
+
+def test_streaming_local_section_is_refined_by_late_gemini_intent(db, rec, monkeypatch):
+    import threading
+    from concurrent.futures import Future
+    import src.intent
+    import src.recommender
+
+    fut = Future()
+    threading.Timer(0.2, fut.set_result, args=({"mode": "mood", "mood": "funny", "keywords": ["comedy"]},)).start()
+    monkeypatch.setattr(src.intent, "remote_intent", lambda query: fut)
+    monkeypatch.setattr(src.recommender, "remote_intent", lambda query: fut)
+    sections = list(rec.iter_recommendations("qqzx vlorp", top_k=3, include_gemini=False))
+    assert [s for s, _ in sections] == ["local", "local"]
+    assert sections[0][1] != sections[1][1]
+    # Gemini's reading is cached now: the next run serves the refined list straight away
+    assert list(rec.iter_recommendations("qqzx vlorp", top_k=3, include_gemini=False)) == [sections[1]]
+
+
+def test_results_missing_a_source_are_not_cached(db, rec, monkeypatch):
+    import src.gemini_api
+
+    def broken(*args, **kwargs):
+        raise RuntimeError("gemini down")
+    monkeypatch.setattr(src.gemini_api, "gemini_recommend", broken)
+    rec.results_cache.clear()
+    assert rec.get_recommendations("space adventure", top_k=3)
+    assert any(e["status"] != "ok" for e in rec.last_trace)
+    assert len(rec.results_cache) == 0
+
+
+def test_version_is_bumped_after_the_taste_vector_is_saved(db, rec, monkeypatch):
+    import src.taste_rebuild
+    from src.db import SessionLocal, User
+    with SessionLocal() as s:
+        user = User(email="bump-order@example.com", password_hash="x", display_name="B")
+        s.add(user)
+        s.commit()
+        uid = user.id
+    before = rec.user_version(uid)
+    during = []
+    save = src.taste_rebuild.rebuild_user_vector
+
+    def watched(*args, **kwargs):
+        during.append(rec.user_version(uid))
+        return save(*args, **kwargs)
+    monkeypatch.setattr(src.taste_rebuild, "rebuild_user_vector", watched)
+    rec.log_interaction(uid, int(rec.movie_ids[6]), True)
+    assert during == [before] and rec.user_version(uid) != before
+
+
+def test_unresolved_feedback_is_stored_without_a_movie_id(db):
+    import json
+    from src.db import SessionLocal, Interaction, Feedback, User
+    from src.utils import log_unresolved_feedback
+    with SessionLocal() as s:
+        user = User(email="unresolved@example.com", password_hash="x", display_name="N")
+        s.add(user)
+        s.commit()
+        uid = user.id
+    log_unresolved_feedback(uid, "Some Festival Film (2031)", True)
+    with SessionLocal() as s:
+        rows = s.query(Interaction).filter(Interaction.user_id == uid).all()
+        assert [(r.movie_id, r.event) for r in rows] == [(None, "like")]
+        assert json.loads(rows[0].context)["title"] == "Some Festival Film (2031)"
+        assert s.query(Feedback).filter(Feedback.user_id == uid).count() == 0
+
+
+def test_failed_gemini_section_is_unavailable_not_cached(db, rec, monkeypatch):
+    import src.gemini_api
+
+    class Down:
+        def generate_content(self, prompt):
+            raise RuntimeError("quota exceeded")
+    monkeypatch.setattr(src.gemini_api, "get_model", lambda: Down())
+    rec.results_cache.clear()
+    sections = dict(rec.iter_recommendations("heist", top_k=3, include_similar=False))
+    assert sections["gemini"] is None
+    assert not any(key[0] == "gemini" for key in rec.results_cache._data)
+
@@ -0,0 +1,76 @@
+from datetime import timedelta
+
+from sqlalchemy import func, select
+
+from src.db import db_now
+from src.rollup import run_rollups, ROLLUP_NAME
+
+MOVIE = 987654
+
+
+def _add(s, Interaction, id_=None, age=None):
+    # fresh rows get created_at from the DB clock, like the app's writes
+    created = db_now(s) - age if age else None
+    s.add(Interaction(id=id_, user_id=None, movie_id=MOVIE, event="view", value=1.0, created_at=created))
+
+
+def test_mark_does_not_pass_recent_rows(db):
+    from src.db import SessionLocal, Interaction, MovieDailyStats, RollupState
+    run_rollups(settle_seconds=0)   # fold whatever earlier tests logged
+
+    with SessionLocal() as s:
+        base = (s.scalar(select(func.max(Interaction.id))) or 0) + 1
+        _add(s, Interaction, base, age=timedelta(hours=1))
+        _add(s, Interaction, base + 10)                       # just written
+        s.commit()
+
+    assert run_rollups(settle_seconds=300) == 1
+    with SessionLocal() as s:
+        assert s.get(RollupState, ROLLUP_NAME).last_id == base
+        # a lower id that only becomes visible now (late commit) is still picked up
+        _add(s, Interaction, base + 5)
+        s.commit()
+
+    assert run_rollups(settle_seconds=0) == 2
+    with SessionLocal() as s:
+        total = s.scalar(select(func.sum(MovieDailyStats.count)).where(MovieDailyStats.movie_id == MOVIE))
+    assert total == 3
+
+
+def test_retention_archives_then_deletes_and_reloads(db, tmp_path):
+    import pandas as pd
+    from src.db import SessionLocal, Interaction
+    from src.rollup import apply_retention, load_archive
+
+    old = db_now() - timedelta(days=400)
+    with SessionLocal() as s:
+        rows = [
+            Interaction(user_id=None, movie_id=MOVIE + 1, event="like", value=1.0, context='{"q": "x"}',
+                        created_at=old),
+            Interaction(user_id=None, movie_id=None, event="search", value=None, context=None,
+                        created_at=old + timedelta(seconds=1)),
+        ]
+        s.add_all(rows)
+        s.commit()
+        ids = [r.id for r in rows]
+    run_rollups(settle_seconds=0)
+    with SessionLocal() as s:   # old but not rolled up yet: must survive retention
+        late = Interaction(user_id=None, movie_id=MOVIE + 2, event="view", value=1.0, created_at=old)
+        s.add(late)
+        s.commit()
+        late_id = late.id
+
+    archived, files = apply_retention(days=365, archive_dir=tmp_path)
+    assert archived >= 2 and files and all(f.exists() for f in files)
+    with SessionLocal() as s:
+        left = set(s.scalars(select(Interaction.id).where(Interaction.id.in_(ids + [late_id]))))
+    assert left == {late_id}
+
+    df = load_archive(tmp_path).set_index("id").loc[ids]
+    assert int(df["movie_id"].iloc[0]) == MOVIE + 1 and pd.isna(df["movie_id"].iloc[1])
+    assert pd.isna(df["user_id"]).all()
+    assert df["event"].tolist() == ["like", "search"]
+    assert df["value"].iloc[0] == 1.0 and pd.isna(df["value"].iloc[1])
+    assert df["context"].tolist() == ['{"q": "x"}', ""]
+    assert pd.to_datetime(df["created_at"]).tolist() == [pd.Timestamp(old), pd.Timestamp(old) + timedelta(seconds=1)]
+    assert apply_retention(days=365, archive_dir=tmp_path) == (0, [])   # nothing left to move
@@ -0,0 +1,38 @@
+import threading
+import time
+
+import pandas as pd
+
+from src.seen import SeenIndex
+
+
+def test_mark_during_load_is_not_lost(db):
+    from src.db import SessionLocal, User, Feedback
+    with SessionLocal() as s:
+        user = User(email="seen-race@example.com", password_hash="x", display_name="S")
+        s.add(user)
+        s.commit()
+        uid = user.id
+
+    seen = SeenIndex(pd.Index([10, 20, 30]))
+    original_load = seen._load
+    loaded = threading.Event()
+
+    def slow_load(user_id):
+        entry = original_load(user_id)   # DB already read: feedback written now is not in `entry`
+        loaded.set()
+        time.sleep(0.2)
+        return entry
+
+    seen._load = slow_load
+    reader = threading.Thread(target=seen.seen_mask, args=(uid,))
+    reader.start()
+    loaded.wait(5)
+    with SessionLocal() as s:
+        s.add(Feedback(user_id=uid, movie_id=20, liked=True))
+        s.commit()
+    seen.mark(uid, 20, True)
+    reader.join()
+
+    assert seen.seen_mask(uid).tolist() == [False, True, False]
+    assert seen.liked(uid) == [20]
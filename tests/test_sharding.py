@@ -0,0 +1,68 @@
+import copy
+
+import numpy as np
+import pytest
+
+from src.embeddings import LSAEmbedder
+from src.sharding import ShardedRecommender, StaleShardsError, build_shards
+
+
+def _checks(rec):
+    mask = np.ones(len(rec.movie_ids), dtype=bool)
+    mask[::3] = False
+    seed = int(rec.movie_ids[1])
+    return {
+        "by_keywords": lambda e: e.by_keywords("space adventure robots", 40),
+        "by_keywords_masked": lambda e: e.by_keywords(["comedy", "romance"], 40, mask=mask),
+        "by_popular": lambda e: e.by_popular(40, mask=mask),
+        "similar_to": lambda e: e.similar_to(seed, 40, mask=mask),
+    }
+
+
+@pytest.fixture(scope="module")
+def embedding_rec(rec, tmp_path_factory):
+    emb_rec = copy.copy(rec)
+    emb_rec.backend = "embedding"
+    emb_rec.embedder = LSAEmbedder(dim=32, model_dir=tmp_path_factory.mktemp("emb")).fit(rec.X, rec.movie_ids)
+    return emb_rec
+
+
+@pytest.mark.parametrize("n_shards", [1, 3, 7])
+@pytest.mark.parametrize("backend", ["tfidf", "embedding"])
+def test_sharded_results_equal_single_engine(rec, embedding_rec, tmp_path, n_shards, backend):
+    engine = rec if backend == "tfidf" else embedding_rec
+    sharded = ShardedRecommender.load_or_build(engine, n_shards, tmp_path, parallel=False)
+    assert sharded.n_shards == n_shards
+    for name, fn in _checks(engine).items():
+        expected, got = fn(engine).reset_index(drop=True), fn(sharded).reset_index(drop=True)
+        assert expected.equals(got), name
+
+
+def test_parallel_shards_equal_single_engine(rec, tmp_path):
+    sharded = ShardedRecommender.load_or_build(rec, 3, tmp_path, parallel=True)
+    try:
+        for name, fn in _checks(rec).items():
+            assert fn(rec).reset_index(drop=True).equals(fn(sharded).reset_index(drop=True)), name
+    finally:
+        sharded.close()
+
+
+def test_stale_shards_are_refused_and_rebuilt(rec, tmp_path):
+    build_shards(rec, 3, tmp_path)
+    with pytest.raises(StaleShardsError):
+        ShardedRecommender("fingerprint-of-another-catalog", tmp_path, parallel=False)
+
+    changed = copy.copy(rec)
+    changed.X = rec.X.copy()
+    changed.X.data = changed.X.data * 0.5   # same sparsity, different weights
+    fingerprint = LSAEmbedder.fingerprint(changed.X, changed.movie_ids)
+    with pytest.raises(StaleShardsError):
+        ShardedRecommender(fingerprint, tmp_path, parallel=False)
+    assert ShardedRecommender.load_or_build(changed, 3, tmp_path, parallel=False).fingerprint == fingerprint
+
+    # a shard left over from another build is caught too
+    (tmp_path / "keep").mkdir()
+    build_shards(rec, 3, tmp_path / "keep")
+    (tmp_path / "keep" / "shard_001.npz").replace(tmp_path / "shard_001.npz")
+    with pytest.raises(StaleShardsError):
+        ShardedRecommender(fingerprint, tmp_path, parallel=False)
@@ -0,0 +1,24 @@
+import bench_startup
+
+
+def test_login_path_imports_stay_light():
+    modules = bench_startup.login_imports(repeat=3)
+    assert bench_startup.leaked_modules(modules) == []
+    assert bench_startup.total_ms(modules) <= bench_startup.BUDGET_MS
+
+
+def test_login_imports_follow_the_app_file(tmp_path):
+    app = tmp_path / "streamlit_app.py"
+    app.write_text(
+        "from typing import TYPE_CHECKING\n"
+        "import streamlit as st\n"
+        "from src.auth import login_user\n"
+        "import pandas as pd   # a heavy import added later\n"
+        "if TYPE_CHECKING:\n"
+        "    from src.recommender import Recommender\n"
+        "def page():\n"
+        "    import sklearn\n"
+    )
+    statement = bench_startup.app_imports(app)
+    assert statement == "import typing, streamlit, src.auth, pandas"
+    assert bench_startup.leaked_modules(bench_startup.importtime(statement)) == ["pandas"]
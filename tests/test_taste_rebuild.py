@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import sparse
+
+from src.taste_rebuild import COLUMNS, compute_user_vectors, event_weights
+
+NOW = datetime(2026, 1, 1)
+
+
+def _frame(rows):
+    return pd.DataFrame(rows, columns=COLUMNS)
+
+
+def test_event_weights_decay_by_half_life():
+    df = _frame([
+        (1, 10, "like", 1.0, NOW),
+        (1, 10, "like", 1.0, NOW - timedelta(days=90)),
+        (1, 10, "dislike", -1.0, NOW - timedelta(days=180)),
+        (1, 10, "view", None, NOW + timedelta(days=1)),   # clock skew: never weighted above 1
+    ])
+    assert event_weights(df, NOW, half_life_days=90) == pytest.approx([1.0, 0.5, -0.25, 0.1])
+
+
+def test_event_weights_scale_rate_around_three():
+    df = _frame([
+        (1, 10, "rate", 5.0, NOW),
+        (1, 10, "rate", 3.0, NOW),
+        (1, 10, "rate", 1.5, NOW),
+        (1, 10, "rate", None, NOW),     # missing rating counts as neutral
+        (1, 10, "unknown", 1.0, NOW),
+    ])
+    assert event_weights(df, NOW) == pytest.approx([1.0, 0.0, -0.75, 0.0, 0.0])
+
+
+def test_compute_user_vectors_normalizes_and_sums_duplicates():
+    X = sparse.csr_matrix(np.array([[1.0, 0.0, 0.0], [0.0, 2.0, 0.0], [0.0, 0.0, 3.0]]))
+    movie_index = pd.Index([100, 200, 300])
+    df = _frame([
+        (2, 100, "like", 1.0, NOW),
+        (2, 100, "like", 1.0, NOW),       # same movie twice: weights add up
+        (2, 200, "like", 1.0, NOW),
+        (5, 300, "dislike", -1.0, NOW),
+        (7, 999, "like", 1.0, NOW),       # movie no longer in the catalog
+    ])
+    user_ids, U = compute_user_vectors(df, X, movie_index, NOW)
+    assert list(user_ids) == [2, 5, 7]
+    U = U.toarray()
+    assert U[0] == pytest.approx(np.array([2.0, 2.0, 0.0]) / np.sqrt(8))
+    assert U[1] == pytest.approx([0.0, 0.0, -1.0])
+    assert not U[2].any()   # kept, zeroed: its stale vector gets overwritten
+
+
+def test_online_update_matches_bulk_rebuild(db, rec):
+    from src.db import SessionLocal, User
+    from src.taste_rebuild import user_interactions
+    with SessionLocal() as s:
+        user = User(email="online-taste@example.com", password_hash="x", display_name="T")
+        s.add(user)
+        s.commit()
+        uid = user.id
+    for mid, liked in [(rec.movie_ids[3], True), (rec.movie_ids[4], True), (rec.movie_ids[5], False)]:
+        rec.log_interaction(uid, int(mid), liked)
+    online = rec._get_user_vector(uid)
+    _, U = compute_user_vectors(user_interactions(uid), rec.X, rec._row_index,
+                                datetime.now(timezone.utc).replace(tzinfo=None))
+    assert np.linalg.norm(online) == pytest.approx(1.0, abs=1e-5)
+    assert online == pytest.approx(U.toarray().ravel(), abs=1e-5)
@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from src.tfidf_build import build_tfidf
+
+
+@pytest.fixture(scope="module")
+def texts():
+    from src.data_prep import DataStore
+    return list(DataStore().get_movie_text()["text"].values)
+
+
+@pytest.mark.parametrize("workers, chunk_size, max_features", [(3, 100, 5000), (4, 37, 300), (1, 250, 5000)])
+def test_chunked_build_matches_sklearn(texts, workers, chunk_size, max_features):
+    assert chunk_size < len(texts)
+    expected = TfidfVectorizer(max_features=max_features, stop_words="english")
+    X_expected = expected.fit_transform(texts)
+
+    vectorizer, X, _ = build_tfidf(texts, max_features=max_features, stop_words="english",
+                                   workers=workers, chunk_size=chunk_size)
+    assert vectorizer.vocabulary_ == expected.vocabulary_
+    np.testing.assert_allclose(vectorizer.idf_, expected.idf_)
+    assert X.shape == X_expected.shape
+    assert abs(X - X_expected).max() < 1e-12
+    query = ["toy story space adventure"]
+    assert abs(vectorizer.transform(query) - expected.transform(query)).max() < 1e-12